@@ -0,0 +1,87 @@
+'''
+Compares the cost of converting OMML equations to MathML before and after the
+introduction of the process-wide stylesheet registry and the fused transform.
+
+    python benchmarks/bench_equations.py [path] [-n REPEAT]
+
+"before": both stylesheets are compiled for every converter and every equation
+goes through two XSLT passes. "after": the fused stylesheet is compiled once per
+process and every equation goes through a single pass.
+'''
+import os
+import sys
+import glob
+import time
+import argparse
+
+from docx import Document
+from lxml import etree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from word2md import stylesheets, mathml_cache
+
+M_NAMESPACE = 'http://schemas.openxmlformats.org/officeDocument/2006/math'
+
+def compile_legacy():
+    mml_transform = etree.XSLT(etree.parse(os.path.join(stylesheets.XSL_PATH, stylesheets.OMML2MML)))
+    remove_namespaces = etree.XSLT(etree.parse(os.path.join(stylesheets.XSL_PATH, stylesheets.REMOVE_NAMESPACES)))
+    return mml_transform, remove_namespaces
+
+def convert_legacy(equation, mml_transform, remove_namespaces):
+    mml = mml_transform(equation)
+    mml = remove_namespaces(mml.getroot())
+    return etree.tostring(mml, encoding='unicode')
+
+def document_legacy(equations):
+    mml_transform, remove_namespaces = compile_legacy()
+    return [convert_legacy(eq, mml_transform, remove_namespaces) for eq in equations]
+
+def document_registry(equations):
+    return [stylesheets.omml_to_mathml(eq) for eq in equations]
+
+def timed(function, *args, repeat=10):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(*args)
+    return (time.perf_counter() - start) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark for the OMML to MathML conversion.')
+    parser.add_argument('path', nargs='?', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'examples'),
+                        help='Word file or folder with Word files (default: examples)')
+    parser.add_argument('-n', '--repeat', type=int, default=20, help='Number of repetitions per measurement')
+    args = parser.parse_args()
+
+    files = [args.path] if os.path.isfile(args.path) else sorted(glob.glob(os.path.join(args.path, '**', '*.docx'), recursive=True))
+    documents = {f: Document(f).element.findall('.//{%s}oMath' % M_NAMESPACE) for f in files}
+
+    start = time.perf_counter()
+    mml_transform, remove_namespaces = compile_legacy()
+    compile_time = time.perf_counter() - start
+    start = time.perf_counter()
+    stylesheets.get_stylesheet(stylesheets.OMML2MML_WITHOUT_NAMESPACES)
+    registry_compile_time = time.perf_counter() - start
+
+    print(f'Stylesheet compilation: before {compile_time * 1000:.2f} ms per converter, after {registry_compile_time * 1000:.2f} ms once per process')
+
+    all_equations = [eq for equations in documents.values() for eq in equations]
+    if all_equations:
+        for eq in all_equations:
+            assert convert_legacy(eq, mml_transform, remove_namespaces) == stylesheets.omml_to_mathml(eq)
+        before = timed(lambda: [convert_legacy(eq, mml_transform, remove_namespaces) for eq in all_equations], repeat=args.repeat) / len(all_equations)
+        after = timed(lambda: [stylesheets.omml_to_mathml(eq) for eq in all_equations], repeat=args.repeat) / len(all_equations)
+        print(f'Per equation ({len(all_equations)} equations): before {before * 1000:.3f} ms, after {after * 1000:.3f} ms')
+        cache = mathml_cache.MathMLCache()
+        cached = timed(lambda: [cache.convert(eq) for eq in all_equations], repeat=args.repeat) / len(all_equations)
+        print(f'Per equation with MathML cache: {cached * 1000:.3f} ms')
+
+    print()
+    print(f'{"Document":60} {"Equations":>9} {"Before [ms]":>12} {"After [ms]":>12}')
+    for f, equations in documents.items():
+        before = timed(document_legacy, equations, repeat=args.repeat)
+        after = timed(document_registry, equations, repeat=args.repeat)
+        print(f'{os.path.relpath(f, args.path)[-60:]:60} {len(equations):9} {before * 1000:12.2f} {after * 1000:12.2f}')
+
+if __name__ == '__main__':
+    main()
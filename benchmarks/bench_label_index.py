@@ -0,0 +1,82 @@
+'''
+Compares MarkdownTable.get_cell_content before and after the introduction of
+the TableLabelIndex on key/value tables with an increasing number of rows.
+
+    python benchmarks/bench_label_index.py [-n REPEAT]
+
+Each run looks up the labels the converters use on the same table.
+"before" scans all cells with strings_equal and joins the cell texts on
+every access. The results are checked against it, also for tables in which
+a label matches one cell exactly and other cells only similarly.
+'''
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from word2md.helpers import strings_equal
+from word2md.markdown_document import MarkdownTable
+
+LABELS = ['Class ID', 'Name', 'System configuration ID', 'Reference to Test Specification', 'Use Case Example', 'Missing label']
+
+def create_table(rows):
+    table = MarkdownTable()
+    for r in range(rows):
+        table.add_simple_row(f'Parameter {r}', f'Value of parameter {r}', f'Unit {r % 7}', heading_cols=[0])
+    table.add_simple_row('Name', 'Benchmark table', heading_cols=[0])
+    table.add_simple_row('Class ID', 'CL-1', heading_cols=[0])
+    return table
+
+def get_cell_content_legacy(table, text_to_find, col_delta=1, row_delta=0):
+    for r, row in enumerate(table.rows):
+        for c, cell in enumerate(row.cells):
+            if strings_equal('\n'.join([p.text for p in cell.paragraphs]), text_to_find):
+                row_data = r + row_delta
+                cells_data = c + col_delta
+                if len(table.rows) > row_data and row_data >= 0 and len(table.rows[row_data].cells) > cells_data and cells_data >= 0:
+                    return '\n'.join([p.text for p in table.rows[row_data].cells[cells_data].paragraphs])
+    return None
+
+def check_similar_matches():
+    # The only exact match has no cell to its right, the similar one before it has
+    table = MarkdownTable()
+    table.add_simple_row('Name:', 'Voltage controller')
+    table.add_simple_row('Description', 'Controls the voltage', 'Name')
+    assert MarkdownTable.get_cell_content(table, 'Name') == get_cell_content_legacy(table, 'Name') == 'Voltage controller'
+
+    # A similar match comes before the exact match in scan order
+    table = MarkdownTable()
+    table.add_simple_row('Class ID:', 'CL-1')
+    table.add_simple_row('Class ID', 'CL-2')
+    assert MarkdownTable.get_cell_content(table, 'Class ID') == get_cell_content_legacy(table, 'Class ID') == 'CL-1'
+
+def lookup_all(get_cell_content, table):
+    return [get_cell_content(table, label, col_delta, row_delta) for label in LABELS for col_delta, row_delta in [(1, 0), (0, 1)]]
+
+def timed(function, *args, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    check_similar_matches()
+    print(f'{"Rows":>6} {"Cells":>7} {"Before [ms]":>12} {"First [ms]":>11} {"Repeated [ms]":>14} {"Speedup":>8}')
+    for rows in [10, 50, 200, 1000]:
+        table = create_table(rows)
+        before, expected = timed(lookup_all, get_cell_content_legacy, table, repeat=args.repeat)
+        # The first lookups build the index, later lookups of the same labels are answered from it
+        first, result = timed(lookup_all, MarkdownTable.get_cell_content, table, repeat=1)
+        assert result == expected
+        repeated, result = timed(lookup_all, MarkdownTable.get_cell_content, table, repeat=args.repeat)
+        assert result == expected
+        print(f'{rows:6} {rows * 3 + 4:7} {before * 1000:12.1f} {first * 1000:11.2f} {repeated * 1000:14.3f} {before / first:7.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+'''
+Compares the conversion of paragraph and table cell texts to HTML with
+markdown.markdown() and with the markdown_engine.
+
+    python benchmarks/bench_markdown.py [-n REPEAT] [input_folder]
+
+The texts are all paragraphs and table cells of the Word files in the input
+folder (default: examples). "cold" clears the cache of the engine before each
+run, "warm" reuses it as a conversion of several Word files does.
+'''
+import os
+import sys
+import glob
+import time
+import argparse
+
+import markdown
+from docx import Document
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from word2md import markdown_engine
+
+def collect_texts(folder):
+    texts = []
+    for docx_file in sorted(glob.glob(os.path.join(folder, '**', '*.docx'), recursive=True)):
+        doc = Document(docx_file)
+        texts.extend(p.text for p in doc.paragraphs)
+        for table in doc.tables:
+            for cell in table._cells:
+                texts.extend(p.text for p in cell.paragraphs)
+    return texts
+
+def timed(function, texts, repeat, before=None):
+    total = 0
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        results = [function(t) for t in texts]
+        total += time.perf_counter() - start
+    return total / repeat, results
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input_folder', nargs='?', default='examples')
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    texts = collect_texts(args.input_folder)
+    plain = sum(1 for t in texts if markdown_engine.is_plain_text(t))
+    print(f'{len(texts)} texts, {len(set(texts))} distinct, {plain} plain text')
+
+    before, expected = timed(markdown.markdown, texts, args.repeat)
+    cold, results = timed(markdown_engine.to_html, texts, args.repeat, before=markdown_engine.convert_cached.cache_clear)
+    assert results == expected
+    warm, results = timed(markdown_engine.to_html, texts, args.repeat)
+    assert results == expected
+
+    print(f'{"":>20} {"Time [ms]":>10} {"Speedup":>8}')
+    print(f'{"markdown.markdown":>20} {before * 1000:10.1f}')
+    print(f'{"engine (cold)":>20} {cold * 1000:10.1f} {before / cold:7.2f}x')
+    print(f'{"engine (warm)":>20} {warm * 1000:10.1f} {before / warm:7.2f}x')
+
+if __name__ == '__main__':
+    main()
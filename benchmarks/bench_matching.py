@@ -0,0 +1,63 @@
+'''
+Compares matching table headings against the known headings with
+helpers.match_strings as before (one SequenceMatcher per pair) and with a
+StringMatcher prepared once.
+
+    python benchmarks/bench_matching.py [-n REPEAT]
+
+"sequence" gives the same results as match_strings. "ngram" uses sets of
+character bigrams, "Agreement" is the share of its matches that are the same.
+'''
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from word2md.helpers import StringMatcher, compare_strings, strings_equal
+
+CANDIDATES = ['Control Function Input', 'Control Function Output', 'Use Case Example', 'Control Function Identification', 'Algorithms',
+              'Component description', 'System Configuration Identification', 'Test Case', 'Test Specification', 'Experiment Specification']
+
+def create_headings(count):
+    random.seed(0)
+    headings = []
+    for _ in range(count):
+        heading = list(random.choice(CANDIDATES + ['Parameters', 'Notes on the configuration of the laboratory']))
+        for _ in range(random.randint(0, 4)):
+            heading.insert(random.randrange(len(heading) + 1), random.choice('abcdefgh  '))
+        headings.append(''.join(heading))
+    return headings
+
+def match_strings_legacy(string, strings_to_match):
+    string_ratios = [{'string': s2, 'ratio': compare_strings(string, s2)} for s2 in strings_to_match]
+    best_match = max(string_ratios, key=lambda x: x['ratio'])
+    if strings_equal(string, best_match['string']):
+        return best_match['string']
+    return None
+
+def timed(function, *args, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f'{"Headings":>9} {"Before [ms]":>12} {"sequence [ms]":>14} {"Speedup":>8} {"ngram [ms]":>11} {"Agreement":>10}')
+    for count in [10, 100, 1000, 10000]:
+        headings = create_headings(count)
+        before, expected = timed(lambda: [match_strings_legacy(h, CANDIDATES) for h in headings], repeat=args.repeat)
+        sequence, result = timed(lambda: StringMatcher(CANDIDATES).match_all(headings), repeat=args.repeat)
+        assert result == expected
+        ngram, result = timed(lambda: StringMatcher(CANDIDATES, method=StringMatcher.NGRAM).match_all(headings), repeat=args.repeat)
+        agreement = sum(1 for a, b in zip(result, expected) if a == b) / count
+        print(f'{count:9} {before * 1000:12.1f} {sequence * 1000:14.1f} {before / sequence:7.2f}x {ngram * 1000:11.1f} {agreement:9.0%}')
+
+if __name__ == '__main__':
+    main()
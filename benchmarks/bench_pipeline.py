@@ -0,0 +1,166 @@
+'''
+Times every stage of the conversion pipeline on synthetic HTD test case
+documents of increasing size (see synthetic_docx.py).
+
+    python benchmarks/bench_pipeline.py [--case NAME ...] [-n REPEAT] [--renderer mustache|native] [--output results.json]
+
+Stages per Word file:
+    open              open_document() (python-docx without the graphics)
+    get_converter     choice of the converter
+    internal_convert  conversion to MarkdownDocuments
+    to_dict           encoding of all pages for the templates (0 for --renderer native)
+    render_mustache   rendering of all pages to strings
+    write             writing of all pages and attachments
+
+The results are written as JSON (stdout or --output) with the minimum time of
+every stage over the repetitions, a summary table is printed to stderr.
+Compare the JSON of two commits to find regressions.
+'''
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from dataclasses import asdict, replace
+
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from convert import ConverterManager, RENDERERS
+from word2md.converter_factory import get_converter
+from word2md.converter_base import open_document
+from word2md.renderer import EmbeddedTemplate
+from synthetic_docx import SyntheticDocumentGenerator, SyntheticDocumentSpec
+
+STAGES = ['open', 'get_converter', 'internal_convert', 'to_dict', 'render_mustache', 'write']
+
+CASES = {
+    'default': SyntheticDocumentSpec(),
+    'rows-50': SyntheticDocumentSpec(table_rows=50),
+    'rows-200': SyntheticDocumentSpec(table_rows=200),
+    'rows-1000': SyntheticDocumentSpec(table_rows=1000),
+    'specs-8': SyntheticDocumentSpec(test_specs=8, experiment_specs=2),
+    'specs-32': SyntheticDocumentSpec(test_specs=32, experiment_specs=2),
+    'plain-rows-1000': SyntheticDocumentSpec(table_rows=1000, bullet_list_every=0, equation_every=0, image_every=0, nested_table_every=0),
+}
+
+def run_pipeline(docx_file, output_dir, renderer):
+    manager = ConverterManager(docx_file, output_dir, create_folder=True, renderer=renderer)
+    times = {}
+
+    start = time.perf_counter()
+    document = open_document(docx_file)
+    times['open'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    converter = get_converter(document)
+    times['get_converter'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    md_documents = converter.internal_convert()
+    times['internal_convert'] = time.perf_counter() - start
+
+    # As ConverterManager.convert_docx does
+    for md_doc in md_documents:
+        md_doc.source_file = docx_file
+        md_doc.is_extension = converter.is_extension
+        for attachment in md_doc.attachments:
+            attachment.bind_source(docx_file)
+    output_docs = manager.get_output_docs(md_documents, output_dir)
+
+    start = time.perf_counter()
+    contents = []
+    if renderer == 'mustache':
+        contents = [manager.add_template_constants(output_doc.markdown_document.to_dict(skip_keys=('parent_docs',))) for output_doc in output_docs]
+    times['to_dict'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pages = []
+    for i, output_doc in enumerate(output_docs):
+        header = manager.get_md_header(output_doc)
+        if renderer == 'mustache':
+            pages.append(manager.render_mustache({'header': header, 'content': EmbeddedTemplate('MDContent.mustache', contents[i])}, 'MDDocument.mustache'))
+        else:
+            pages.append(manager.render_native(header, output_doc.markdown_document))
+    times['render_mustache'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for output_doc, page in zip(output_docs, pages):
+        manager.make_sure_exisits(output_doc.output_dir)
+        with open(os.path.join(output_doc.output_dir, output_doc.file_name), 'w', encoding='utf-8') as output:
+            output.write(page)
+        for attachment in output_doc.markdown_document.attachments:
+            with open(os.path.join(output_doc.output_dir, attachment.src), 'wb') as fs:
+                attachment.write_to(fs)
+    times['write'] = time.perf_counter() - start
+
+    cells = sum(len(row.cells) for md_doc in md_documents for section in md_doc.sections for table in section.tables for row in table.rows)
+    return times, len(output_docs), cells
+
+def get_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--case', action='append', choices=sorted(CASES), help='Benchmark case, can be given several times (default: all).')
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    parser.add_argument('--renderer', choices=RENDERERS, default='mustache')
+    parser.add_argument('--output', help='JSON file for the results (default: stdout).')
+    args = parser.parse_args()
+
+    results = []
+    work_dir = tempfile.mkdtemp(prefix='word2md-bench-')
+    try:
+        for name in args.case or list(CASES):
+            spec = CASES[name]
+            docx_file = os.path.join(work_dir, f'{name}.docx')
+            SyntheticDocumentGenerator(replace(spec)).save(docx_file)
+
+            best = {}
+            for i in range(args.repeat):
+                output_dir = os.path.join(work_dir, f'{name}-{i}')
+                times, pages, cells = run_pipeline(docx_file, output_dir, args.renderer)
+                shutil.rmtree(output_dir, ignore_errors=True)
+                for stage in STAGES:
+                    best[stage] = min(best.get(stage, times[stage]), times[stage])
+
+            results.append({
+                'case': name,
+                'spec': asdict(spec),
+                'docx_bytes': os.path.getsize(docx_file),
+                'pages': pages,
+                'table_cells': cells,
+                'stages': best,
+                'total': sum(best.values()),
+            })
+            print(f'{name:>16} {cells:7} cells ' + ' '.join(f'{stage} {best[stage] * 1000:8.1f} ms' for stage in STAGES), file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'renderer': args.renderer,
+        'repeat': args.repeat,
+        'unit': 'seconds',
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == '__main__':
+    main()
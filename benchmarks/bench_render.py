@@ -0,0 +1,69 @@
+'''
+Compares rendering the Markdown file of a document with chevron, as
+ConverterManager.render_mustache did before, and with the TemplateRenderer
+for tables with an increasing number of cells.
+
+    python benchmarks/bench_render.py [-n REPEAT]
+
+The documents are encoded with to_dict() once, only the rendering is measured.
+'''
+import io
+import os
+import sys
+import time
+import argparse
+
+import chevron
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from word2md.markdown_document import MarkdownDocument, MarkdownSection, MarkdownTable
+from word2md.renderer import TemplateRenderer, EmbeddedTemplate, TEMPLATES_PATH
+
+def create_content(rows, cols):
+    md_doc = MarkdownDocument(title='Benchmark', short_title='Benchmark', description='Large table')
+    section = MarkdownSection(heading='Table')
+    table = MarkdownTable()
+    for r in range(rows):
+        table.add_simple_row(*[f'Cell {r}/{c}' for c in range(cols)], heading_cols=[0])
+    section.tables.append(table)
+    section.add_simple_paragraph('Some *text*')
+    md_doc.sections.append(section)
+    content = md_doc.to_dict()
+    content.update({'openbrace': '{', 'closebrace': '}', 'newline': '\n'})
+    return content
+
+def render_chevron(content):
+    with open(os.path.join(TEMPLATES_PATH, 'MDContent.mustache'), 'r') as template:
+        md_content = chevron.render(template=template, data=content, partials_path=TEMPLATES_PATH)
+    with open(os.path.join(TEMPLATES_PATH, 'MDDocument.mustache'), 'r') as template:
+        return chevron.render(template=template, data={'header': 'title: Benchmark\n', 'content': md_content}, partials_path=TEMPLATES_PATH)
+
+def render_compiled(renderer, content):
+    output = io.StringIO()
+    data = {'header': 'title: Benchmark\n', 'content': EmbeddedTemplate('MDContent.mustache', content)}
+    renderer.render('MDDocument.mustache', data, output.write)
+    return output.getvalue()
+
+def timed(function, *args, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    renderer = TemplateRenderer()
+    print(f'{"Table":>12} {"Cells":>7} {"chevron [ms]":>13} {"compiled [ms]":>14} {"Speedup":>8}')
+    for rows, cols in [(10, 5), (100, 5), (500, 5), (1000, 10), (2000, 10)]:
+        content = create_content(rows, cols)
+        before, expected = timed(render_chevron, content, repeat=args.repeat)
+        after, result = timed(render_compiled, renderer, content, repeat=args.repeat)
+        assert result == expected
+        print(f'{f"{rows} x {cols}":>12} {rows * cols:7} {before * 1000:13.1f} {after * 1000:14.1f} {before / after:7.2f}x')
+
+if __name__ == '__main__':
+    main()
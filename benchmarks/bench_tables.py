@@ -0,0 +1,86 @@
+'''
+Compares the table parsing of Word2MDConverter before and after the
+introduction of the XML table walker on wide and long synthetic tables.
+
+    python benchmarks/bench_tables.py [-n REPEAT]
+
+"before": cells are resolved with python-docx row.cells (which builds the cell
+grid of the whole table for every row) and headings are detected with a regex
+over the serialized cell XML. "after": get_table_cells() and the XML based
+has_background_color().
+'''
+import os
+import re
+import sys
+import time
+import argparse
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from word2md.system_configuration import SystemConfigurationConverter
+
+class LegacyConverter(SystemConfigurationConverter):
+    def get_table_cells(self, table):
+        return [self.get_legacy_raw_cells(row) for row in table.rows]
+
+    def get_legacy_raw_cells(self, row):
+        cells = []
+        row_cells = row.cells
+        for c in row_cells:
+            if len(cells) == 0 or c != cells[-1]['this']:
+                cell = {'this': c, 'colspan': row_cells.count(c)}
+                cells.append(cell)
+        return cells
+
+    def has_background_color(self, cell):
+        pattern = re.compile('w:fill=\"(\\S*)\"')
+        match = pattern.search(cell._tc.xml)
+        if match:
+            result = match.group(1)
+            if result and result != 'auto':
+                return True
+        return False
+
+def create_table(document, rows, cols):
+    table = document.add_table(rows=rows, cols=cols)
+    for i, cell in enumerate(table._cells):
+        r, c = divmod(i, cols)
+        cell.text = f'Cell {r}/{c}'
+        # Shade the first column like the heading cells of the templates
+        if c == 0:
+            cell._tc.get_or_add_tcPr().append(parse_xml(f'<w:shd {nsdecls("w")} w:val="clear" w:color="auto" w:fill="D9D9D9"/>'))
+    # Some horizontally and vertically merged cells
+    for r in range(0, rows - 1, 4):
+        table.cell(r, 1).merge(table.cell(r, min(2, cols - 1)))
+        table.cell(r + 1, cols - 1).merge(table.cell(min(r + 3, rows - 1), cols - 1))
+    return table
+
+def timed(function, *args, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+def table_signature(md_table):
+    return [[(cell.is_heading, cell.colspan, cell.text) for cell in row.cells] for row in md_table.rows]
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark for parsing Word tables.')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='Number of repetitions per measurement')
+    args = parser.parse_args()
+
+    print(f'{"Table":>16} {"Cells":>7} {"Before [ms]":>12} {"After [ms]":>12} {"Speedup":>8}')
+    for rows, cols in [(10, 10), (10, 50), (10, 200), (100, 4), (250, 4), (500, 4)]:
+        document = Document()
+        table = create_table(document, rows, cols)
+        before, legacy_table = timed(LegacyConverter(document).parse_table, table, repeat=args.repeat)
+        after, md_table = timed(SystemConfigurationConverter(document).parse_table, table, repeat=args.repeat)
+        assert table_signature(legacy_table) == table_signature(md_table)
+        print(f'{f"{rows} x {cols}":>16} {rows * cols:7} {before * 1000:12.1f} {after * 1000:12.1f} {before / after:7.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''
+Compares MarkdownBase.to_dict before and after the introduction of the
+TreeEncoder on documents with large MarkdownTables.
+
+    python benchmarks/bench_to_dict.py [-n REPEAT]
+
+"before": the tree is serialized to a JSON string with encode() and parsed
+again. "after": TreeEncoder builds the dicts directly. The second measurement
+encodes a child page (e.g. a test specification) whose parent document holds
+the large table, as ConverterManager.to_md does for every child page.
+'''
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from word2md.markdown_document import MarkdownDocument, MarkdownSection, MarkdownTable
+
+def create_document(rows, cols, html=False):
+    md_doc = MarkdownDocument(title='Benchmark', short_title='Benchmark', description='Large table')
+    section = MarkdownSection(heading='Table')
+    table = MarkdownTable()
+    for r in range(rows):
+        table.add_simple_row(*[f'Cell {r}/{c} with *some* text' for c in range(cols)], heading_cols=[0])
+    section.tables.append(table)
+    md_doc.sections.append(section)
+    if html:
+        # Leave out the Markdown conversion to measure the encoding only
+        for row in table.rows:
+            for cell in row.cells:
+                for p in cell.paragraphs:
+                    p.html_text = f'<p>{p.text}</p>'
+    return md_doc
+
+def create_child_document(rows, cols):
+    child_doc = create_document(2, 2)
+    child_doc.parent_docs.append(create_document(rows, cols))
+    return child_doc
+
+def to_dict_legacy(md_doc):
+    return json.loads(json.dumps(md_doc, default=lambda mb: mb.encode()))
+
+def timed(function, *args, repeat=3):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(*args)
+    return (time.perf_counter() - start) / repeat, result
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark for MarkdownBase.to_dict.')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='Number of repetitions per measurement')
+    args = parser.parse_args()
+
+    print('Encoding only')
+    print(f'{"Table":>12} {"Cells":>7} {"Before [ms]":>12} {"After [ms]":>12} {"Speedup":>8}')
+    for rows, cols in [(10, 5), (100, 5), (500, 5), (1000, 10)]:
+        md_doc = create_document(rows, cols, html=True)
+        before, legacy_dict = timed(to_dict_legacy, md_doc, repeat=args.repeat)
+        after, md_dict = timed(md_doc.to_dict, repeat=args.repeat)
+        assert legacy_dict == md_dict
+        print(f'{f"{rows} x {cols}":>12} {rows * cols:7} {before * 1000:12.1f} {after * 1000:12.1f} {before / after:7.2f}x')
+
+    print()
+    print('Render context of a child page with a large table in its parent document')
+    print(f'{"Table":>12} {"Cells":>7} {"Before [ms]":>12} {"After [ms]":>12} {"Speedup":>8}')
+    for rows, cols in [(10, 5), (100, 5), (500, 5)]:
+        md_doc = create_child_document(rows, cols)
+        before, legacy_dict = timed(to_dict_legacy, md_doc, repeat=args.repeat)
+        after, md_dict = timed(md_doc.to_dict, ('parent_docs',), repeat=args.repeat)
+        legacy_dict.pop('parent_docs')
+        assert legacy_dict == md_dict
+        print(f'{f"{rows} x {cols}":>12} {rows * cols:7} {before * 1000:12.1f} {after * 1000:12.1f} {before / after:7.2f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''
+Checks that the native renderer produces the same Markdown files as the
+mustache templates and compares their rendering time.
+
+    python benchmarks/compare_renderers.py [input_folder] [--rows ROWS --cols COLS]
+
+All Word files in the input folder (default: examples, recursively) are
+converted once and every page is rendered with both backends. The script
+exits with status 1 if any page differs. A synthetic document with a large
+table (--rows x --cols cells) is rendered in addition to measure the
+throughput on large tables.
+'''
+import os
+import sys
+import glob
+import time
+import difflib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from convert import ConverterManager, OutputDocument
+from word2md.markdown_document import MarkdownDocument, MarkdownSection, MarkdownTable
+
+def create_large_document(rows, cols):
+    md_doc = MarkdownDocument(title='Benchmark', short_title='Benchmark', description='Large table')
+    section = MarkdownSection(heading='Table')
+    table = MarkdownTable()
+    for r in range(rows):
+        table.add_simple_row(*[f'Cell {r}/{c}' for c in range(cols)], heading_cols=[0])
+    section.tables.append(table)
+    md_doc.sections.append(section)
+    return OutputDocument(markdown_document=md_doc, output_dir='', file_name='_index.md', date='2024-01-01')
+
+def render_all(manager, output_docs):
+    start = time.perf_counter()
+    pages = [manager.to_md(output_doc) for output_doc in output_docs]
+    return time.perf_counter() - start, pages
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('input_folder', nargs='?', default='examples')
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--cols', type=int, default=10)
+    args = parser.parse_args()
+
+    mustache = ConverterManager(args.input_folder, '', renderer='mustache')
+    native = ConverterManager(args.input_folder, '', renderer='native')
+
+    output_docs = []
+    for docx_file in sorted(glob.glob(os.path.join(args.input_folder, '**', '*.docx'), recursive=True)):
+        output_docs.extend(mustache.convert_files([docx_file], ''))
+
+    differences = 0
+    mustache_time, expected = render_all(mustache, output_docs)
+    native_time, pages = render_all(native, output_docs)
+    for output_doc, expected_page, page in zip(output_docs, expected, pages):
+        if page != expected_page:
+            differences += 1
+            print(f'DIFFERENT: {output_doc.markdown_document.source_file} - {output_doc.markdown_document.title}')
+            sys.stdout.writelines(difflib.unified_diff(expected_page.splitlines(True), page.splitlines(True), 'mustache', 'native', n=1))
+    print(f'{len(output_docs)} pages, {differences} different')
+    print(f'{"":>28} {"mustache [ms]":>14} {"native [ms]":>12} {"Speedup":>8}')
+    print(f'{args.input_folder:>28} {mustache_time * 1000:14.1f} {native_time * 1000:12.1f} {mustache_time / native_time:7.2f}x')
+
+    large_doc = create_large_document(args.rows, args.cols)
+    native.to_md(large_doc)
+    mustache_time, expected = render_all(mustache, [large_doc])
+    native_time, pages = render_all(native, [large_doc])
+    if pages != expected:
+        differences += 1
+        print('DIFFERENT: large table')
+    print(f'{f"{args.rows} x {args.cols} table":>28} {mustache_time * 1000:14.1f} {native_time * 1000:12.1f} {mustache_time / native_time:7.2f}x')
+
+    sys.exit(1 if differences else 0)
+
+if __name__ == '__main__':
+    main()
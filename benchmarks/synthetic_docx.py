@@ -0,0 +1,205 @@
+'''
+Generates synthetic Word files in the structure of the ERIGrid holistic test
+description (HTD) template: a test case with its table and qualification
+strategy, test specifications with mapping to research infrastructure and
+experiment specifications referencing them.
+
+    python benchmarks/synthetic_docx.py destination [--test-specs N] [--table-rows N] ...
+
+The size of the document and the kind of content in the tables (bullet lists,
+OMML equations, PNG images, nested tables) are set with a SyntheticDocumentSpec.
+'''
+import io
+import os
+import sys
+import zlib
+import struct
+import argparse
+from dataclasses import dataclass, fields
+
+from docx import Document
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn, nsdecls
+from docx.shared import Cm
+from docx.table import _Cell
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from word2md.numbering import NumberingIndex
+
+TEST_CASE_LABELS = ['Name of the Test Case', 'Narrative', 'Function(s) under Investigation (FuI)', 'Object under Investigation (OuI)',
+                    'Domain under Investigation (DuI)', 'Purpose of Investigation (PoI)', 'System under Test (SuT)', 'Functions under Test (FuT)',
+                    'Test criteria', 'Target metrics', 'Variability attributes', 'Quality attributes']
+TEST_SPECIFICATION_LABELS = ['Reference to Test Case', 'Title of Test', 'Test Rationale', 'Specific Test System', 'Target measures',
+                             'Input and output parameters', 'Test Design', 'Initial system state', 'Evolution of system state and test signals',
+                             'Other parameters', 'Temporal resolution', 'Source of uncertainty', 'Suspension criteria / Stopping criteria']
+EXPERIMENT_SPECIFICATION_LABELS = ['Reference to Test Case', 'Title of Experiment', 'Reference to Test Specification', 'Research Infrastructure',
+                                   'Experimental Setup', 'Experimental Design and Justification', 'Precision of equipment',
+                                   'Uncertainty measurement', 'Storage of experiment data']
+
+@dataclass
+class SyntheticDocumentSpec:
+    test_specs : int = 2
+    experiment_specs : int = 1
+    # Additional rows of every table beyond the labels of the template
+    table_rows : int = 0
+    # Every n-th value cell contains the given content, 0 disables it
+    bullet_list_every : int = 4
+    equation_every : int = 5
+    image_every : int = 7
+    nested_table_every : int = 9
+    bullet_list_items : int = 3
+    nested_table_size : int = 3
+    image_size : int = 64
+    qualification_paragraphs : int = 5
+
+def create_png(size, seed=0) -> bytes:
+    '''
+    Creates a size x size RGB PNG image with a gradient that depends on seed.
+    '''
+    def chunk(chunk_type, data):
+        return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff)
+
+    # Every row starts with filter type 0 (None)
+    raw = b''.join(b'\x00' + b''.join(bytes(((x * 4 + seed) % 256, (y * 4) % 256, (x + y + seed * 8) % 256)) for x in range(size)) for y in range(size))
+    header = struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b'')
+
+def create_omml(seed) -> str:
+    return (f'<m:oMathPara {nsdecls("m")}><m:oMath>'
+            f'<m:f><m:num><m:r><m:t>P{seed}</m:t></m:r></m:num><m:den><m:r><m:t>U</m:t></m:r></m:den></m:f>'
+            f'<m:r><m:t>+</m:t></m:r><m:sSup><m:e><m:r><m:t>x</m:t></m:r></m:e><m:sup><m:r><m:t>{seed % 9 + 2}</m:t></m:r></m:sup></m:sSup>'
+            f'</m:oMath></m:oMathPara>')
+
+class SyntheticDocumentGenerator:
+    def __init__(self, spec : SyntheticDocumentSpec = None) -> None:
+        self.spec = spec or SyntheticDocumentSpec()
+        self.counter = 0
+
+    def generate(self, test_case_id='TC01') -> Document:
+        document = Document()
+        self.document = document
+        self.bullet_num_id, self.decimal_num_id = self.find_numberings(document)
+
+        self.add_bold_paragraph(document, f'Test Case {test_case_id}')
+        document.add_paragraph('Author\tA. Author, B. Author\tVersion 1.0')
+        document.add_paragraph('Project\tSynthetic benchmark\tDate\t2024-01-01')
+        self.add_table(document, TEST_CASE_LABELS, {'Name of the Test Case': f'Synthetic test case {test_case_id}'}, merge_labels=True)
+
+        self.add_bold_paragraph(document, 'Qualification Strategy')
+        for i in range(self.spec.qualification_paragraphs):
+            document.add_paragraph(f'The qualification strategy step {i} is described in this paragraph.')
+        self.add_list(document, self.bullet_num_id)
+        self.add_equation(document.add_paragraph())
+
+        test_spec_ids = []
+        for ts in range(1, self.spec.test_specs + 1):
+            ts_id = f'{test_case_id}.TS{ts:02}'
+            test_spec_ids.append(ts_id)
+            self.add_bold_paragraph(document, f'Test Specification {ts_id}')
+            self.add_table(document, TEST_SPECIFICATION_LABELS, {'Reference to Test Case': test_case_id, 'Title of Test': f'Synthetic test {ts_id}'})
+            self.add_bold_paragraph(document, 'Mapping to Research Infrastructure')
+            document.add_paragraph(f'The test {ts_id} is mapped to the research infrastructure as shown below.')
+            self.add_image(document.add_paragraph())
+
+        for ts_id in test_spec_ids:
+            for es in range(1, self.spec.experiment_specs + 1):
+                es_id = f'{ts_id}.ES{es:02}'
+                self.add_bold_paragraph(document, f'Experiment Specification {es_id}')
+                self.add_table(document, EXPERIMENT_SPECIFICATION_LABELS, {'Reference to Test Case': test_case_id, 'Title of Experiment': f'Synthetic experiment {es_id}', 'Reference to Test Specification': ts_id})
+
+        return document
+
+    def save(self, path, test_case_id='TC01'):
+        self.generate(test_case_id).save(path)
+
+    def to_bytes(self, test_case_id='TC01') -> bytes:
+        stream = io.BytesIO()
+        self.generate(test_case_id).save(stream)
+        return stream.getvalue()
+
+    @staticmethod
+    def find_numberings(document):
+        numbering_index = NumberingIndex(document.part.numbering_part.element)
+        bullet_num_id = decimal_num_id = None
+        for num in document.part.numbering_part.element.findall(qn('w:num')):
+            num_id = num.get(qn('w:numId'))
+            level = numbering_index.get_level(num_id, '0')
+            if level is None:
+                continue
+            if level.num_fmt == 'bullet' and bullet_num_id is None:
+                bullet_num_id = num_id
+            elif level.num_fmt == 'decimal' and decimal_num_id is None:
+                decimal_num_id = num_id
+        return bullet_num_id, decimal_num_id
+
+    def add_bold_paragraph(self, container, text):
+        container.add_paragraph().add_run(text).bold = True
+
+    def add_list(self, container, num_id):
+        for i in range(self.spec.bullet_list_items):
+            p = container.add_paragraph(f'List item {i} with some text')
+            num_pr = parse_xml(f'<w:numPr {nsdecls("w")}><w:ilvl w:val="{i % 2}"/><w:numId w:val="{num_id}"/></w:numPr>')
+            p._p.get_or_add_pPr().append(num_pr)
+
+    def add_image(self, paragraph):
+        self.counter += 1
+        paragraph.add_run().add_picture(io.BytesIO(create_png(self.spec.image_size, self.counter)), width=Cm(2))
+
+    def add_equation(self, paragraph):
+        self.counter += 1
+        paragraph._p.append(parse_xml(create_omml(self.counter)))
+
+    def add_table(self, document, labels, values, merge_labels=False):
+        labels = labels + [f'Additional parameter {r}' for r in range(self.spec.table_rows)]
+        cols = 3 if merge_labels else 2
+        table = document.add_table(rows=len(labels), cols=cols)
+        # table.cell() builds the cell grid of the whole table on every call, the cells are taken from the rows instead
+        for r, (label, row) in enumerate(zip(labels, table.rows)):
+            tcs = row._tr.tc_lst
+            label_tc = tcs[0].merge(tcs[1]) if merge_labels else tcs[0]
+            label_cell = _Cell(label_tc, table)
+            label_cell.text = label
+            value_cell = _Cell(tcs[-1], table)
+            value_cell.text = values.get(label, f'Value of {label.lower()} in row {r}.')
+            self.fill_cell(value_cell, r)
+        return table
+
+    def fill_cell(self, cell, r):
+        spec = self.spec
+        if spec.bullet_list_every and r % spec.bullet_list_every == spec.bullet_list_every - 1:
+            self.add_list(cell, self.bullet_num_id if r % 2 else self.decimal_num_id)
+        if spec.equation_every and r % spec.equation_every == spec.equation_every - 1:
+            self.add_equation(cell.add_paragraph())
+        if spec.image_every and r % spec.image_every == spec.image_every - 1:
+            self.add_image(cell.add_paragraph())
+        if spec.nested_table_every and r % spec.nested_table_every == spec.nested_table_every - 1:
+            nested = cell.add_table(rows=spec.nested_table_size, cols=spec.nested_table_size)
+            for nested_cell in nested._cells:
+                nested_cell.text = 'Nested value'
+            # Word requires a paragraph after a table at the end of a cell
+            cell.add_paragraph()
+
+def add_spec_arguments(parser):
+    for spec_field in fields(SyntheticDocumentSpec):
+        parser.add_argument('--' + spec_field.name.replace('_', '-'), type=int, default=spec_field.default)
+
+def spec_from_arguments(args) -> SyntheticDocumentSpec:
+    return SyntheticDocumentSpec(**{f.name: getattr(args, f.name) for f in fields(SyntheticDocumentSpec)})
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('destination', help='Folder in which the Word files are saved.')
+    parser.add_argument('--count', type=int, default=1, help='Number of test case documents.')
+    add_spec_arguments(parser)
+    args = parser.parse_args()
+
+    os.makedirs(args.destination, exist_ok=True)
+    generator = SyntheticDocumentGenerator(spec_from_arguments(args))
+    for i in range(1, args.count + 1):
+        path = os.path.join(args.destination, f'TC{i:02}.docx')
+        generator.save(path, test_case_id=f'TC{i:02}')
+        print(path)
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,30 @@
-from typing import List
+from typing import BinaryIO, Dict, List, Union
+import io
 import os
+import time
+import hashlib
+import posixpath
 import argparse
-from docx import Document
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date
-import chevron
 import yaml
 import logging
-from dataclasses import dataclass
-
-from word2md.converter_factory import get_converter
-from word2md.converter_base import MarkdownDocument
+from dataclasses import dataclass, field, asdict
+
+from word2md.converter_factory import get_converter, classify_docx
+from word2md.converter_base import MarkdownDocument, Word2MDConverter, open_document
+from word2md.markdown_document import MarkdownGraphic
+from word2md.build_manifest import BuildManifest
+from word2md.attachment_store import AttachmentStore, replace_file
+from word2md.renderer import get_renderer, EmbeddedTemplate
+from word2md.native_renderer import NativeRenderer
+from word2md.metrics import DocumentMetrics
+from word2md import mathml_cache, metrics
+from word2md.watcher import create_watcher, is_word_file
+from word2md import index_pages
+from word2md.emf_transcoder import EMFTranscoder, CONVERTERS as EMF_CONVERTERS, get_png_path
+from word2md.archive_input import is_archive, get_reader
 
 class OutputDocument_old:
     def __init__(self, header=None, content=None, output_dir=None, file_name=None, attachments=None) -> None:
@@ -29,18 +44,112 @@ class OutputDocument:
     weight : int = 1
     date : str = None
 
+@dataclass
+class OutputRecord:
+    file : str = None
+    title : str = None
+    parent : str = None
+    attachments : List[str] = field(default_factory=list)
+    date : str = None
+    # Files that are written after the conversion (the PNG files of transcoded EMF graphics),
+    # recorded in the manifest so that they are removed with the page
+    pending_attachments : List[str] = field(default_factory=list)
+
+@dataclass
+class ConversionResult:
+    source_file : str = None
+    outputs : List[OutputRecord] = field(default_factory=list)
+    error : str = None
+    peak_rss : int = None
+    # Output files that already had the same content and were not written again
+    unchanged_files : List[str] = field(default_factory=list)
+    metrics : DocumentMetrics = None
+    profile_stats : dict = None
+
+    @property
+    def output_files(self) -> List[str]:
+        files = []
+        for output in self.outputs:
+            files.append(output.file)
+            files.extend(output.attachments)
+        return files
+
+@dataclass
+class ConvertedAttachment:
+    # Path relative to the destination, as convert() would write it
+    path : str = None
+    data : bytes = None
+
+@dataclass
+class ConvertedPage:
+    '''
+    A page converted in memory by ConverterManager.convert_in_memory().
+    '''
+    # Path of the Markdown file relative to the destination, as convert() would write it
+    path : str = None
+    title : str = None
+    content : str = None
+    attachments : List[ConvertedAttachment] = field(default_factory=list)
+
+# Backends that render the Markdown files: the mustache templates in word2md/mustache
+# or the NativeRenderer, which writes the same output without the templates
+RENDERERS = ('mustache', 'native')
+
 class ConverterManager:
 
-    def __init__(self, input_path, destination, create_folder=False, recurse=False, no_emf=False) -> None:
+    def __init__(self, input_path, destination, create_folder=False, recurse=False, no_emf=False, jobs=1, incremental=False, mathml_cache_path=None, report_memory=False, attachment_store_path=None, renderer='mustache', metrics_path=None, profile_path=None, trace_memory=False, stable_output=False, index_pages=False, emf_list_path=None, transcode_emf=None, emf_cache_path=None, emf_workers=1, emf_batch_size=50) -> None:
         self.input_path = input_path
+        # The input may be a zip or tar archive, whose Word files are read without extracting them
+        self.archive_input = is_archive(input_path)
         self.output_dir = destination
         self.create_folder = create_folder
         self.recurse = recurse
         self.no_emf = no_emf
-
-    def to_md(self, output_doc : OutputDocument):    
+        self.jobs = max(1, jobs or 1)
+        self.incremental = incremental
+        self.mathml_cache_path = mathml_cache_path
+        self.report_memory = report_memory
+        self.attachment_store = AttachmentStore(attachment_store_path) if attachment_store_path else None
+        if renderer not in RENDERERS:
+            raise ValueError(f'Unknown renderer "{renderer}", expected one of {", ".join(RENDERERS)}')
+        self.renderer = renderer
+        self.metrics_path = metrics_path
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self.stable_output = stable_output
+        self.index_pages = index_pages
+        self.emf_list_path = emf_list_path
+        if transcode_emf is not None and transcode_emf not in EMF_CONVERTERS:
+            raise ValueError(f'Unknown EMF converter "{transcode_emf}", expected one of {", ".join(EMF_CONVERTERS)}')
+        # Name of the converter in emf_transcoder.CONVERTERS or None
+        self.transcode_emf = transcode_emf
+        self.emf_cache_path = emf_cache_path
+        self.emf_workers = emf_workers
+        self.emf_batch_size = emf_batch_size
+        # Date of the pages per Word file (with stable_output)
+        self.source_dates = {}
+        self.previous_dates = {}
+
+    def to_md(self, output_doc : OutputDocument, output=None):
+        '''
+        Renders the Markdown file of the document into output (a text file)
+        or, if output is None, returns it as string.
+        '''
         md_result = {'header': None, 'content': None}
-        
+        md_result['header'] = self.get_md_header(output_doc)
+
+        if self.renderer == 'native':
+            return self.render_native(md_result['header'], output_doc.markdown_document, output)
+
+        # The templates do not use the parent documents, which would otherwise be encoded for every child page
+        content = output_doc.markdown_document.to_dict(skip_keys=('parent_docs',))
+
+        # The content is rendered directly into the output of the document template
+        md_result['content'] = EmbeddedTemplate('MDContent.mustache', self.add_template_constants(content))
+
+        return self.render_mustache(md_result, 'MDDocument.mustache', output)
+
+    def get_md_header(self, output_doc : OutputDocument) -> str:
         md_header = {}
         md_header['title'] = self.escape_quotes(output_doc.markdown_document.title)
         md_header['linkTitle'] = self.escape_quotes(output_doc.markdown_document.short_title)
@@ -48,46 +157,171 @@ class ConverterManager:
         md_header['date'] = output_doc.date
         md_header['weight'] = output_doc.weight
 
-        md_result['header'] = yaml.dump(md_header)
-
-        content = output_doc.markdown_document.to_dict()
-
-        md_result['content'] = self.render_mustache(content, 'MDContent.mustache')
+        return yaml.dump(md_header)
 
-        return self.render_mustache(md_result, 'MDDocument.mustache')
-        
-    def render_mustache(self, md_content, template_name):
+    def add_template_constants(self, md_content):
         md_content['openbrace'] = '{'
         md_content['closebrace'] = '}'
         md_content['newline'] = '\n'
-        templates_path = os.path.join(os.path.dirname(__file__), 'word2md', 'mustache')
-        with open(os.path.join(templates_path, template_name), 'r') as template:
-            md_file_content = chevron.render(template=template, data=md_content, partials_path=templates_path)
-            return md_file_content
+        return md_content
+        
+    def render_mustache(self, md_content, template_name, output=None):
+        self.add_template_constants(md_content)
+        if output is None:
+            return get_renderer().render_to_string(template_name, md_content)
+        get_renderer().render(template_name, md_content, output.write)
+
+    def render_native(self, header, markdown_document, output=None):
+        if output is None:
+            parts = []
+            NativeRenderer().render(header, markdown_document, parts.append)
+            return ''.join(parts)
+        NativeRenderer().render(header, markdown_document, output.write)
 
     def convert_file(self, doc_filename) -> List[MarkdownDocument]:
+        return self.convert_docx(self.open_input(doc_filename), doc_filename)
+
+    def convert_docx(self, docx : Union[str, BinaryIO], doc_filename) -> List[MarkdownDocument]:
+        '''
+        Converts a Word file given as path or file-like object. doc_filename is the
+        name used as source of the documents and in the messages.
+        '''
         document = None
         try:
-            document = Document(doc_filename)
+            signature = classify_docx(docx)
+        except:
+            logging.error('ERROR: Could not open Word file: {0}'.format(doc_filename))
+            return []
+
+        if signature is None:
+            logging.error('ERROR: No converter avilable for this type of document.')
+            return []
+
+        try:
+            # The graphics are not loaded, they are read from docx when they are written
+            document = open_document(docx)
         except:
             logging.error('ERROR: Could not open Word file: {0}'.format(doc_filename))
             return []
         
-        converter = get_converter(document, no_emf=self.no_emf)
+        converter = get_converter(document, no_emf=self.no_emf, signature=signature)
         if converter is None:
             logging.error('ERROR: No converter avilable for this type of document.')
             return []
         
         logging.info(f'{doc_filename} -> {converter.CONVERTER_TYPE}')
+        if self.stable_output:
+            self.source_dates[doc_filename] = self.get_source_date(document)
         
         md_documents = converter.convert()
 
         for md_doc in md_documents:
             md_doc.source_file = doc_filename
             if converter.is_extension:
-                md_doc.is_extension = True            
+                md_doc.is_extension = True
+            for attachment in md_doc.attachments:
+                attachment.bind_source(docx)
+
+        return md_documents
+
+    def convert_in_memory(self, docx : Union[bytes, BinaryIO], file_name='document.docx') -> List[ConvertedPage]:
+        '''
+        Converts a Word file given as bytes or file-like object and returns its pages with
+        the rendered Markdown and the content of the attachments, without reading or writing
+        any files. The paths of the pages and attachments are relative to the destination
+        and file_name is used for the folder of the pages if create_folder is set.
+        '''
+        if isinstance(docx, (bytes, bytearray, memoryview)):
+            docx = io.BytesIO(docx)
+        self.setup_process()
+
+        pages = []
+        for output_doc in self.get_output_docs(self.convert_docx(docx, file_name), ''):
+            md_doc = output_doc.markdown_document
+            page = ConvertedPage(path=self.relative_path(os.path.join(output_doc.output_dir, output_doc.file_name)), title=md_doc.title, content=self.to_md(output_doc))
+            for attachment in md_doc.attachments:
+                page.attachments.append(ConvertedAttachment(path=self.relative_path(os.path.join(output_doc.output_dir, attachment.src)), data=attachment.read()))
+            pages.append(page)
+        return pages
+
+    def relative_path(self, path):
+        return os.path.normpath(path).replace(os.sep, '/')
+
+    def get_source_date(self, document):
+        '''
+        Date of the last modification saved in the Word file, or of its creation.
+        '''
+        core_properties = document.core_properties
+        source_date = core_properties.modified or core_properties.created
+        return source_date.date().isoformat() if source_date else None
+
+    def get_output_date(self, md_doc : MarkdownDocument):
+        '''
+        Date in the header of the pages. With stable_output, this is the date saved in the Word
+        file or, if it has none, the date of the last conversion, so that converting the same
+        Word file again gives the same pages.
+        '''
+        if self.stable_output:
+            source_date = self.source_dates.get(md_doc.source_file)
+            if source_date is None and md_doc.source_file and self.previous_dates:
+                source_date = self.previous_dates.get(self.get_source_key(md_doc.source_file))
+            if source_date is not None:
+                return source_date
+        return date.today().isoformat()
+
+    def write_if_changed(self, path, data : bytes) -> bool:
+        '''
+        Writes data to path unless the file already has this content, so that its
+        modification time is kept. Returns True if the file was written.
+        '''
+        try:
+            if os.path.getsize(path) == len(data):
+                with open(path, 'rb') as f:
+                    if f.read() == data:
+                        return False
+        except FileNotFoundError:
+            pass
+
+        self.replace_file(path, lambda f: f.write(data))
+        return True
 
-        return md_documents     
+    def write_graphic_if_changed(self, path, graphic : MarkdownGraphic) -> bool:
+        '''
+        Like write_if_changed for a graphic, which is compared with the existing file and
+        written in chunks instead of being read into memory as a whole.
+        '''
+        with graphic.open() as data:
+            if self.file_has_content(path, data):
+                return False
+
+        self.replace_file(path, graphic.write_to)
+        return True
+
+    @staticmethod
+    def file_has_content(path, data : BinaryIO) -> bool:
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: data.read(1024 * 1024), b''):
+                    if f.read(len(chunk)) != chunk:
+                        return False
+                return not f.read(1)
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def replace_file(path, write):
+        '''
+        Writes the file with write(f) to a temporary file and moves it to path.
+        '''
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                write(f)
+            replace_file(tmp_path, path)
+        except:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
     def make_sure_exisits(self, folder_path):
         try:
@@ -95,53 +329,485 @@ class ConverterManager:
         except FileExistsError as e:
             pass
     
-    def convert(self):
-        output_docs = []
-        if os.path.isdir(self.input_path):
-            output_docs = self.convert_folder(self.input_path, self.output_dir, recurse=self.recurse)
-        elif os.path.isfile(self.input_path) and self.input_path.endswith('.docx'):
-            output_docs = self.convert_files([self.input_path], self.output_dir)
-
-        for output_doc in output_docs:
-            md_str = self.to_md(output_doc)
-
-            self.make_sure_exisits(output_doc.output_dir)
-
-            with open(os.path.join(output_doc.output_dir, output_doc.file_name), 'w', encoding='utf-8') as output:
-                output.write(md_str)
+    def setup_process(self):
+        '''
+        Prepares the process-wide state used by the converters. Called in the main
+        process as well as in every worker process of iter_results().
+        '''
+        mathml_cache.configure(self.mathml_cache_path)
+        if self.collect_metrics and metrics.get_recorder() is None:
+            metrics.install(self.get_metric_hooks(), metrics.MetricsRecorder(trace_memory=self.trace_memory, profile=self.profile_path is not None))
+
+    @property
+    def collect_metrics(self):
+        return self.metrics_path is not None or self.profile_path is not None or self.trace_memory
+
+    def get_metric_hooks(self):
+        '''
+        Methods that are instrumented when metrics are collected, as (class, method name, stage[, on_result]).
+        '''
+        hooks = [
+            (ConverterManager, 'convert_file', 'convert_file'),
+            (ConverterManager, 'to_md', 'to_md'),
+            (ConverterManager, 'write_output_doc', 'write_output_doc', self.record_bytes_written),
+        ]
+        hooks.extend(metrics.get_method_hooks(Word2MDConverter, ['internal_convert', 'get_inline_equations', 'get_inline_graphics']))
+        return hooks
+
+    @staticmethod
+    def record_bytes_written(recorder : metrics.MetricsRecorder, record : OutputRecord):
+        for path in [record.file] + record.attachments:
+            recorder.add_bytes_written(os.path.getsize(path))
 
-            # Print attachments
-            for attachment in output_doc.markdown_document.attachments:
-                attachment_path = os.path.join(output_doc.output_dir, attachment.src)        
-                with open(attachment_path, 'wb') as fs:
-                    fs.write(attachment.data)
+    def convert(self):
+        self.run(self.iter_files())
+        peak_rss = self.get_peak_rss() if self.report_memory else None
+        if peak_rss is not None:
+            logging.info(f'Peak RSS: {peak_rss / 1024:.1f} MiB')
 
-    def convert_folder(self, folder, base_output_dir, recurse=False, folder_prefix=None) -> List[OutputDocument]:
-        output_docs = []
+    def run(self, files, removed_files=None, jobs=None) -> List[ConversionResult]:
+        self.setup_process()
+        try:
+            results = self.convert_each(files, removed_files=removed_files, jobs=jobs)
+            if self.index_pages:
+                self.write_index_pages()
+            if self.emf_list_path is not None:
+                self.write_emf_list(results)
+            if self.transcode_emf is not None:
+                self.transcode_emf_files(results)
+            if self.collect_metrics:
+                self.write_metrics(results)
+        finally:
+            metrics.uninstall()
+        return results
+
+    def get_written_files(self, results : List[ConversionResult]) -> List[str]:
+        written_files = []
+        for result in results:
+            if not result.error:
+                unchanged_files = set(result.unchanged_files)
+                written_files.extend(f for f in result.output_files if f not in unchanged_files)
+        return written_files
+
+    def write_index_pages(self) -> List[str]:
+        '''
+        Writes an index page into every folder below the destination that has no page
+        of its own, so that Hugo lists it with a title. All folders are checked, as a
+        folder may lose its page when a Word file is removed.
+        '''
+        written = index_pages.write_index_pages(index_pages.get_folders(self.output_dir))
+        if written:
+            logging.info(f'{len(written)} index pages written')
+        return written
+
+    def get_emf_files(self, results : List[ConversionResult]) -> List[str]:
+        '''
+        EMF graphics written for the results, which have to be converted to PNG.
+        '''
+        return [f for f in self.get_written_files(results) if f.lower().endswith('.emf')]
+
+    def write_emf_list(self, results : List[ConversionResult]):
+        '''
+        Writes the paths of the EMF graphics written for the results to emf_list_path, one per line.
+        '''
+        with open(self.emf_list_path, 'w', encoding='utf-8') as f:
+            for emf_file in self.get_emf_files(results):
+                f.write(emf_file + '\n')
+
+    def transcode_emf_files(self, results : List[ConversionResult]) -> Dict[str, str]:
+        '''
+        Converts the EMF graphics of the results to PNG files next to them. EMF graphics
+        that were not written again are only converted if their PNG file is missing.
+        The size of the PNG files is added to the bytes written of the documents.
+        '''
+        emf_results = {}
+        for result in results:
+            if result.error:
+                continue
+            unchanged_files = set(result.unchanged_files)
+            for f in result.output_files:
+                if f.lower().endswith('.emf') and (f not in unchanged_files or not os.path.isfile(get_png_path(f))):
+                    emf_results[f] = result
+        if not emf_results:
+            return {}
+
+        transcoder = EMFTranscoder(EMF_CONVERTERS[self.transcode_emf](), cache_path=self.emf_cache_path, batch_size=self.emf_batch_size, workers=self.emf_workers)
+        png_files = transcoder.transcode(list(emf_results))
+        logging.info(f'{len(png_files)} of {len(emf_results)} EMF graphics converted to PNG')
+        for emf_file, png_file in png_files.items():
+            result_metrics = emf_results[emf_file].metrics
+            if result_metrics is not None:
+                result_metrics.bytes_written += os.path.getsize(png_file)
+        return png_files
+
+    def watch(self, debounce=0.3, max_delay=5.0, poll_interval=1.0, stop=None):
+        '''
+        Converts all Word files and then converts every Word file again as soon as it
+        is saved, until stop (a threading.Event) is set. Events are collected until
+        no further event arrives for debounce seconds (at most max_delay seconds),
+        as Word writes a document in several steps. Only the changed Word files are
+        converted, in this process, so that the stylesheets, templates and caches
+        stay loaded. The build manifest is used to skip unchanged files and to
+        remove the outputs of deleted files.
+        '''
+        if self.archive_input:
+            raise ValueError(f'Cannot watch the archive {self.input_path}, watch the extracted folder instead')
+        self.incremental = True
+        self.convert()
+
+        watch_folder = self.input_path if os.path.isdir(self.input_path) else (os.path.dirname(self.input_path) or '.')
+        watcher = create_watcher(watch_folder, recurse=self.recurse and os.path.isdir(self.input_path), poll_interval=poll_interval)
+        logging.info(f'Watching {watch_folder} for changes')
+        try:
+            while stop is None or not stop.is_set():
+                changes = watcher.wait(1.0)
+                if changes is not None and not changes:
+                    continue
+                start = time.monotonic()
+                while time.monotonic() - start < max_delay:
+                    more_changes = watcher.wait(debounce)
+                    if more_changes is None:
+                        changes = None
+                    elif not more_changes:
+                        break
+                    elif changes is not None:
+                        changes.update(more_changes)
+                self.convert_changes(changes)
+        finally:
+            watcher.close()
+
+    def convert_changes(self, changed_files=None):
+        '''
+        Converts the changed Word files again and removes the outputs of the deleted
+        ones. If changed_files is None, all Word files are checked.
+        '''
+        start = time.perf_counter()
+        if changed_files is None:
+            results = self.run(self.iter_files(), jobs=1)
+        else:
+            changed_files = sorted(f for f in changed_files if self.is_input_file(f))
+            if not changed_files:
+                return []
+            files = [(f, self.get_file_output_dir(f)) for f in changed_files if os.path.isfile(f)]
+            removed_files = [f for f in changed_files if not os.path.isfile(f)]
+            results = self.run(files, removed_files=removed_files, jobs=1)
+        logging.info(f'Changes converted in {time.perf_counter() - start:.2f} s')
+        return results
+
+    def is_input_file(self, doc_filename) -> bool:
+        '''
+        True for the Word files that convert() would process.
+        '''
+        if not is_word_file(doc_filename):
+            return False
+        if not os.path.isdir(self.input_path):
+            return os.path.abspath(doc_filename) == os.path.abspath(self.input_path)
+        relative_folder = os.path.relpath(os.path.dirname(doc_filename), self.input_path)
+        if relative_folder.startswith(os.pardir):
+            return False
+        return self.recurse or relative_folder == os.curdir
+
+    def get_file_output_dir(self, doc_filename):
+        '''
+        Output folder of a Word file as iter_files() returns it.
+        '''
+        if not os.path.isdir(self.input_path):
+            return self.output_dir
+        return os.path.join(self.output_dir, os.path.relpath(os.path.dirname(doc_filename), self.input_path))
+
+    def write_metrics(self, results : List[ConversionResult]):
+        documents = [result.metrics for result in results if result.metrics is not None]
+        total = metrics.summarize(documents)
+        for stage, stage_metrics in total['stages'].items():
+            logging.info(f'{stage}: {stage_metrics["calls"]} calls, {stage_metrics["time"]:.3f} s')
+        if self.metrics_path:
+            metrics.write_report(self.metrics_path, documents)
+            logging.info(f'Metrics written to {self.metrics_path}')
+        if self.profile_path and metrics.write_profile(self.profile_path, [result.profile_stats for result in results]):
+            logging.info(f'Profile written to {self.profile_path}')
+
+    def convert_each(self, files, removed_files=None, jobs=None) -> List[ConversionResult]:
+        '''
+        Runs the pipeline discover -> convert -> render -> write for the given (file, output_dir)
+        tuples one Word file at a time, either in this process or in a process pool. The
+        Markdown documents and graphics of a Word file are released as soon as its outputs are
+        written, so that memory does not grow with the number of files. With incremental builds,
+        files that did not change since the last run are skipped and outputs of deleted files
+        are removed: the outputs of removed_files or, if it is None, of all Word files of the
+        input folder that are not in files.
+        '''
+        manifest = None
+        if self.incremental:
+            manifest = BuildManifest(self.output_dir, options={'create_folder': self.create_folder, 'no_emf': self.no_emf, 'stable_output': self.stable_output, 'transcode_emf': self.transcode_emf})
+            if self.stable_output:
+                self.previous_dates = manifest.get_dates()
+
+        sources = []
+        file_hashes = {}
+        # Word files that were removed while they were converted, e.g. in watch mode
+        vanished_files = []
+        written = unchanged = deleted = 0
+        def files_to_convert():
+            nonlocal unchanged
+            for doc_filename, output_dir in files:
+                source = self.get_source_key(doc_filename)
+                sources.append(source)
+                if manifest is not None:
+                    try:
+                        file_hashes[doc_filename] = self.get_file_hash(doc_filename)
+                    except FileNotFoundError:
+                        vanished_files.append(doc_filename)
+                        continue
+                    if manifest.is_up_to_date(source, file_hashes[doc_filename]):
+                        logging.info(f'{doc_filename} is unchanged, skipping')
+                        unchanged += len(manifest.get_output_files(source))
+                        continue
+                yield doc_filename, output_dir
+
+        results = []
+        for result in self.iter_results(files_to_convert(), jobs=jobs):
+            self.report_result(result)
+            if not result.error:
+                written += len(result.output_files) - len(result.unchanged_files)
+                unchanged += len(result.unchanged_files)
+            if manifest is not None:
+                source = self.get_source_key(result.source_file)
+                outputs = [self.get_manifest_output(output) for output in result.outputs]
+                if result.error:
+                    # Recorded, so that the outputs are removed with the Word file
+                    manifest.invalidate(source, outputs)
+                    if not self.input_exists(result.source_file):
+                        vanished_files.append(result.source_file)
+                else:
+                    for removed in manifest.update(source, file_hashes[result.source_file], outputs):
+                        logging.info(f'Removed {removed}')
+                        deleted += 1
+            results.append(result)
+
+        if manifest is not None:
+            removed = []
+            for doc_filename in (removed_files or []) + vanished_files:
+                removed.extend(manifest.remove(self.get_source_key(doc_filename)))
+            if removed_files is None and (self.archive_input or os.path.isdir(self.input_path)):
+                removed.extend(manifest.remove_missing(sources))
+            for removed_file in removed:
+                logging.info(f'Removed {removed_file}')
+            deleted += len(removed)
+            manifest.save()
+
+        logging.info(f'{written} files written, {unchanged} unchanged, {deleted} deleted')
+        return results
+
+    def get_source_key(self, doc_filename):
+        if self.archive_input or os.path.isdir(self.input_path):
+            source = os.path.relpath(doc_filename, self.input_path)
+        else:
+            source = os.path.basename(doc_filename)
+        return source.replace(os.sep, '/')
+
+    def get_archive_member(self, doc_filename):
+        return os.path.relpath(doc_filename, self.input_path).replace(os.sep, '/')
+
+    def open_input(self, doc_filename):
+        '''
+        Returns the path of a Word file or, for a Word file in the input archive, its
+        content read from the archive.
+        '''
+        if self.archive_input:
+            return io.BytesIO(get_reader(self.input_path).read(self.get_archive_member(doc_filename)))
+        return doc_filename
+
+    def get_file_hash(self, doc_filename):
+        if self.archive_input:
+            return hashlib.sha256(get_reader(self.input_path).read(self.get_archive_member(doc_filename))).hexdigest()
+        return BuildManifest.file_hash(doc_filename)
+
+    def input_exists(self, doc_filename) -> bool:
+        if self.archive_input:
+            return self.get_archive_member(doc_filename) in get_reader(self.input_path).members
+        return os.path.isfile(doc_filename)
+
+    def relative_output_record(self, output : OutputRecord) -> OutputRecord:
+        def rel(path):
+            return os.path.relpath(path, self.output_dir).replace(os.sep, '/') if path else path
+        return OutputRecord(file=rel(output.file), title=output.title, parent=rel(output.parent), attachments=[rel(a) for a in output.attachments], date=output.date, pending_attachments=[rel(a) for a in output.pending_attachments])
+
+    def get_manifest_output(self, output : OutputRecord) -> dict:
+        '''
+        Entry of an output in the build manifest. The pending attachments are listed with the attachments.
+        '''
+        manifest_output = asdict(self.relative_output_record(output))
+        manifest_output['attachments'].extend(manifest_output.pop('pending_attachments'))
+        return manifest_output
+
+    def get_pending_attachments(self, attachment_path) -> List[str]:
+        if self.transcode_emf is not None and attachment_path.lower().endswith('.emf'):
+            return [get_png_path(attachment_path)]
+        return []
+
+    def get_output_record(self, output_doc : OutputDocument) -> OutputRecord:
+        record = OutputRecord(file=os.path.join(output_doc.output_dir, output_doc.file_name), title=output_doc.markdown_document.title, date=output_doc.date)
+        record.attachments = [os.path.join(output_doc.output_dir, attachment.src) for attachment in output_doc.markdown_document.attachments]
+        record.pending_attachments = [f for attachment_path in record.attachments for f in self.get_pending_attachments(attachment_path)]
+        return record
+
+    def write_output_doc(self, output_doc : OutputDocument, unchanged_files : List[str] = None) -> OutputRecord:
+        '''
+        Writes the page and the attachments of a document. With stable_output, files that
+        already have the same content are not written again and added to unchanged_files.
+        '''
+        self.make_sure_exisits(output_doc.output_dir)
+        if unchanged_files is None:
+            unchanged_files = []
+
+        md_path = os.path.join(output_doc.output_dir, output_doc.file_name)
+        if self.stable_output:
+            # Same encoding and line endings as the text file below
+            page = self.to_md(output_doc).replace('\n', os.linesep)
+            if not self.write_if_changed(md_path, page.encode('utf-8')):
+                unchanged_files.append(md_path)
+        else:
+            with open(md_path, 'w', encoding='utf-8') as output:
+                try:
+                    self.to_md(output_doc, output)
+                except:
+                    # Do not leave a partially rendered page behind
+                    output.close()
+                    os.remove(md_path)
+                    raise
+        record = OutputRecord(file=md_path, title=output_doc.markdown_document.title, date=output_doc.date)
+
+        # Print attachments
+        for attachment in output_doc.markdown_document.attachments:
+            attachment_path = os.path.join(output_doc.output_dir, attachment.src)
+            if self.attachment_store is not None:
+                if not self.attachment_store.link(self.attachment_store.add(attachment), attachment_path):
+                    unchanged_files.append(attachment_path)
+            elif self.stable_output:
+                if not self.write_graphic_if_changed(attachment_path, attachment):
+                    unchanged_files.append(attachment_path)
+            else:
+                # Replaced instead of overwritten, as it may be a hard link into the attachment store of an earlier run
+                self.replace_file(attachment_path, attachment.write_to)
+            record.attachments.append(attachment_path)
+            record.pending_attachments.extend(self.get_pending_attachments(attachment_path))
+
+        return record
+
+    def iter_files(self, folder=None, base_output_dir=None, folder_prefix=None):
+        '''
+        Yields the Word files that convert() processes as (file, output_dir) tuples,
+        the files of a folder after those of its subfolders.
+        '''
+        if folder is None:
+            if self.archive_input:
+                yield from self.iter_archive_files()
+                return
+            if os.path.isfile(self.input_path) and self.input_path.endswith('.docx'):
+                yield (self.input_path, self.output_dir)
+                return
+            folder = self.input_path
+            base_output_dir = self.output_dir
 
         if folder_prefix is None:
             folder_prefix = folder
 
         if os.path.isdir(folder):
-            files_to_convert = []
             output_dir = os.path.join(base_output_dir, os.path.relpath(folder, folder_prefix))
+            folder_files = []
             for f in os.scandir(folder):
-                if f.is_file() and f.path.endswith('.docx'):
-                    files_to_convert.append(f.path)
-                elif recurse and f.is_dir():
-                    output_docs.extend(self.convert_folder(f, base_output_dir, recurse=recurse, folder_prefix=folder_prefix))
-
-            output_docs.extend(self.convert_files(files_to_convert, output_dir))
-        
-        return output_docs
-
-    def convert_files(self, files_to_convert, output_dir) -> List[OutputDocument]:
+                if f.is_file() and is_word_file(f.path):
+                    folder_files.append((f.path, output_dir))
+                elif self.recurse and f.is_dir():
+                    yield from self.iter_files(f, base_output_dir, folder_prefix=folder_prefix)
+            yield from folder_files
+
+    def iter_archive_files(self):
+        '''
+        Yields the Word files in the input archive like iter_files() does for the folder
+        the archive would be extracted to. The files are named by their path in the archive,
+        appended to the path of the archive.
+        '''
+        for member in get_reader(self.input_path).list_members():
+            member_folder = posixpath.dirname(member)
+            if member_folder and not self.recurse:
+                continue
+            yield (os.path.join(self.input_path, *member.split('/')), os.path.join(self.output_dir, *(member_folder or os.curdir).split('/')))
+
+    def convert_and_write(self, doc_filename, output_dir) -> ConversionResult:
+        '''
+        Converts a single Word file and writes its outputs. Used by the worker processes
+        of iter_results(), so that only a small result record has to be sent back.
+        '''
+        result = ConversionResult(source_file=doc_filename)
+        recorder = None
         output_docs = []
+        try:
+            self.setup_process()
+            recorder = metrics.get_recorder()
+            if recorder is not None:
+                recorder.begin_document(doc_filename)
+            output_docs = self.convert_files([doc_filename], output_dir)
+            output_paths = {id(output_doc.markdown_document): os.path.join(output_doc.output_dir, output_doc.file_name) for output_doc in output_docs}
+            for output_doc in output_docs:
+                record = self.write_output_doc(output_doc, result.unchanged_files)
+                parent_docs = output_doc.markdown_document.parent_docs
+                if parent_docs:
+                    record.parent = output_paths.get(id(parent_docs[-1]))
+                result.outputs.append(record)
+        except Exception:
+            result.error = traceback.format_exc()
+            if not self.input_exists(doc_filename):
+                # The Word file was removed during the conversion, all outputs it may have written are removed with it
+                result.outputs = [self.get_output_record(output_doc) for output_doc in output_docs]
+        if recorder is not None:
+            result.metrics, result.profile_stats = recorder.end_document()
+        if self.report_memory:
+            result.peak_rss = self.get_peak_rss()
+        return result
+
+    def iter_results(self, files, jobs=None):
+        '''
+        Converts and writes the given (file, output_dir) tuples and yields a ConversionResult
+        for each of them in order. With more than one job (default: self.jobs), the files are
+        distributed over a process pool and every worker writes its outputs directly.
+        '''
+        jobs = jobs or self.jobs
+        if jobs == 1:
+            for doc_filename, output_dir in files:
+                yield self.convert_and_write(doc_filename, output_dir)
+            return
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [(doc_filename, executor.submit(self.convert_and_write, doc_filename, output_dir)) for doc_filename, output_dir in files]
+            for doc_filename, future in futures:
+                try:
+                    result = future.result()
+                except Exception:
+                    result = ConversionResult(source_file=doc_filename, error=traceback.format_exc())
+                yield result
+
+    def get_peak_rss(self):
+        '''
+        Peak resident set size of this process in KiB, or None where it is not available (Windows).
+        '''
+        return metrics.get_peak_rss()
+
+    def report_result(self, result : ConversionResult):
+        if result.error:
+            logging.error(f'ERROR: Conversion failed for {result.source_file}:\n{result.error}')
+        if result.peak_rss is not None:
+            logging.info(f'{result.source_file}: peak RSS {result.peak_rss / 1024:.1f} MiB')
 
+    def convert_files(self, files_to_convert, output_dir) -> List[OutputDocument]:
         md_documents : List[MarkdownDocument] = []
         for f in files_to_convert:
             md_documents.extend(self.convert_file(f))
 
+        return self.get_output_docs(md_documents, output_dir)
+
+    def get_output_docs(self, md_documents : List[MarkdownDocument], output_dir) -> List[OutputDocument]:
+        output_docs = []
         for md_doc in md_documents:
             md_header = {}
             md_header['title'] = self.escape_quotes(md_doc.title)
@@ -160,7 +826,7 @@ class ConverterManager:
                 output_dir=output_file_dir, 
                 file_name=file_name, 
                 weight=weight, 
-                date=self.escape_quotes(date.today().isoformat())
+                date=self.escape_quotes(self.get_output_date(md_doc))
             )
             output_docs.append(out_doc)
 
@@ -185,21 +851,50 @@ class ConverterManager:
         return os.path.join(self.get_output_file_dir(base_output_dir, md_doc.parent_docs[-1]), folder_name)
 
 
+def convert_in_memory(docx : Union[bytes, BinaryIO], file_name='document.docx', **options) -> List[ConvertedPage]:
+    '''
+    Converts a Word file in memory, see ConverterManager.convert_in_memory(). The options
+    are those of ConverterManager, e.g. create_folder, no_emf or renderer.
+    '''
+    return ConverterManager(None, '', **options).convert_in_memory(docx, file_name)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Converts test cases according to the ERIGrid HTD Template from Word to Markdown files.')
-    parser.add_argument('path', help='Path to either a Word file or a folder. If a folder is provided, all Word files in that folder will be converted.')
+    parser.add_argument('path', help='Path to either a Word file, a folder or a zip or tar archive. If a folder or an archive is provided, all Word files in it will be converted, without extracting the archive.')
     parser.add_argument('destination', help='Path to a folder where the output will be saved. If "create-folder" is true, the output folder is created.')
     parser.add_argument('-f', '--create-folder', help='Saves the Markdown file and extracted images to a folder in "destination" with the name of the Word file.', 
                         action='store_true')
     parser.add_argument('-r', '--recurse', help='Recurse subfolders', action='store_true')
     parser.add_argument('-e', '--no-emf', help='Forces graphics with file ending ".emf" to ".png".', action='store_true')
+    parser.add_argument('-i', '--incremental', help='Only converts Word files that changed since the last run into "destination" and removes outputs of deleted Word files.', action='store_true')
+    parser.add_argument('-w', '--watch', help='Converts all Word files and then keeps converting every Word file that is saved, added or removed, until interrupted. Implies "incremental".', action='store_true')
+    parser.add_argument('-s', '--stable-output', help='Takes the date of the pages from the Word files instead of the current date and only writes output files whose content changed, so that unchanged files keep their modification time.', action='store_true')
+    parser.add_argument('--index-pages', help='Writes an index page with the folder name as title into every output folder without a page of its own.', action='store_true')
+    parser.add_argument('--emf-list', help='Writes the paths of the EMF graphics written during the conversion to this file, one per line.', default=None)
+    parser.add_argument('--transcode-emf', help='Converts the EMF graphics to PNG files next to them after the conversion, with LibreOffice or, for tests, with a stub that writes empty images. Use together with "no-emf".', choices=list(EMF_CONVERTERS), default=None)
+    parser.add_argument('--emf-cache', help='Path to a folder in which the converted EMF graphics are kept by content, so that they are only converted once.', default=None)
+    parser.add_argument('--emf-workers', help='Number of LibreOffice processes converting EMF graphics in parallel.', type=int, default=1)
+    parser.add_argument('--emf-batch-size', help='Number of EMF graphics converted by one LibreOffice process.', type=int, default=50)
+    parser.add_argument('--mathml-cache', help='Path to a sqlite database in which the MathML of converted equations is cached between runs.', default=None)
+    parser.add_argument('--attachment-store', help='Path to a folder in which every distinct attachment is stored once. The attachments of the pages are hard links into this folder.', default=None)
+    parser.add_argument('--report-memory', help='Logs the peak resident set size after every Word file and at the end of the conversion.', action='store_true')
+    parser.add_argument('--renderer', help='Renders the Markdown files with the mustache templates or with the native renderer, which is faster for large tables and produces the same output.', choices=RENDERERS, default='mustache')
+    parser.add_argument('--metrics-json', help='Writes the wall time, call counts, bytes written and peak memory of the conversion stages per Word file as JSON to this path.', default=None)
+    parser.add_argument('--profile', help='Writes cProfile statistics of the conversion to this path (pstats format).', default=None)
+    parser.add_argument('--trace-memory', help='Records the peak memory allocated by Python per Word file with tracemalloc. Slows down the conversion.', action='store_true')
+    parser.add_argument('-j', '--jobs', help='Number of worker processes used to convert Word files in parallel.', type=int, default=1)
     args = parser.parse_args()    
 
     logging.basicConfig(format='%(asctime)s - %(message)s', level=logging.INFO)
 
-    converter_manager = ConverterManager(args.path, args.destination, create_folder=args.create_folder, recurse=args.recurse, no_emf=args.no_emf)
+    converter_manager = ConverterManager(args.path, args.destination, create_folder=args.create_folder, recurse=args.recurse, no_emf=args.no_emf, jobs=args.jobs, incremental=args.incremental, mathml_cache_path=args.mathml_cache, report_memory=args.report_memory, attachment_store_path=args.attachment_store, renderer=args.renderer, metrics_path=args.metrics_json, profile_path=args.profile, trace_memory=args.trace_memory, stable_output=args.stable_output, index_pages=args.index_pages, emf_list_path=args.emf_list, transcode_emf=args.transcode_emf, emf_cache_path=args.emf_cache, emf_workers=args.emf_workers, emf_batch_size=args.emf_batch_size)
 
     logging.info(f'Conversion started for {args.path}')
-    converter_manager.convert()
+    if args.watch:
+        try:
+            converter_manager.watch()
+        except KeyboardInterrupt:
+            logging.info('Watch stopped')
+    else:
+        converter_manager.convert()
     logging.info(f'Conversion completed. Output files written to {args.destination}')
\ No newline at end of file
@@ -0,0 +1,94 @@
+from typing import List
+import os
+import logging
+import tarfile
+import zipfile
+import posixpath
+import threading
+
+from word2md.watcher import is_word_file
+
+ZIP_EXTENSIONS = ('.zip',)
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+def is_archive(path) -> bool:
+    '''
+    True for zip and tar archives (also compressed) that can be used as input instead of a folder.
+    '''
+    return path is not None and path.lower().endswith(ZIP_EXTENSIONS + TAR_EXTENSIONS) and os.path.isfile(path)
+
+def normalize_member_name(name):
+    '''
+    Returns the member name as relative path with '/' as separator, or None for members
+    that would be placed outside of the folder the archive is extracted to.
+    '''
+    name = posixpath.normpath(name.replace('\\', '/'))
+    if name.startswith('/') or name == '..' or name.startswith('../') or name == '.':
+        return None
+    return name
+
+class ArchiveReader:
+    '''
+    Reads the Word files of a zip or tar archive without extracting it.
+    '''
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.lock = threading.Lock()
+        self.members = {}
+        if path.lower().endswith(ZIP_EXTENSIONS):
+            self.zip_file = zipfile.ZipFile(path)
+            self.tar_file = None
+            for info in self.zip_file.infolist():
+                self.add_member(info.filename, info, not info.is_dir())
+        else:
+            self.zip_file = None
+            # A compressed tar file can only be read sequentially: reading a member that lies before
+            # the last one read decompresses the archive from its start again. iter_archive_files()
+            # yields the members in archive order, and the worker processes of -j take them from the
+            # queue in that order, so every process decompresses the archive about twice (once for the
+            # list of members, once for the members it converts). Zip archives have no such cost.
+            self.tar_file = tarfile.open(path, 'r:*')
+            for info in self.tar_file.getmembers():
+                self.add_member(info.name, info, info.isfile())
+
+    def add_member(self, name, info, is_file):
+        if not is_file or not is_word_file(name):
+            return
+        normalized_name = normalize_member_name(name)
+        if normalized_name is None:
+            logging.warning(f'Skipping {name} in {self.path}: path outside of the archive')
+            return
+        self.members[normalized_name] = info
+
+    def list_members(self) -> List[str]:
+        '''
+        Names of the Word files in the archive, relative paths with '/' as separator.
+        '''
+        return list(self.members)
+
+    def read(self, name) -> bytes:
+        info = self.members[name]
+        with self.lock:
+            if self.zip_file is not None:
+                return self.zip_file.read(info)
+            with self.tar_file.extractfile(info) as f:
+                return f.read()
+
+    def close(self):
+        if self.zip_file is not None:
+            self.zip_file.close()
+        if self.tar_file is not None:
+            self.tar_file.close()
+
+_readers = {}
+
+def get_reader(path) -> ArchiveReader:
+    '''
+    Returns the reader of an archive, opened once per process.
+    '''
+    key = (os.path.abspath(path), os.getpid())
+    reader = _readers.get(key)
+    if reader is None:
+        reader = _readers[key] = ArchiveReader(path)
+    return reader
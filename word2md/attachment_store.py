@@ -0,0 +1,111 @@
+import os
+import stat
+import hashlib
+import tempfile
+
+from word2md.markdown_document import MarkdownGraphic
+
+def make_writable(path) -> bool:
+    '''
+    Windows cannot replace or remove read-only files, such as hard links to the blobs of a
+    store. Makes path writable and returns True if it was read-only. The blob becomes writable
+    with it and is checked by AttachmentStore.is_valid() before it is used again.
+    '''
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return False
+    if mode & stat.S_IWUSR:
+        return False
+    os.chmod(path, mode | stat.S_IWUSR)
+    return True
+
+def replace_file(source, target):
+    '''
+    os.replace that also replaces read-only files on Windows.
+    '''
+    try:
+        os.replace(source, target)
+    except PermissionError:
+        if not make_writable(target):
+            raise
+        os.replace(source, target)
+
+class AttachmentStore:
+    '''
+    Content-addressed store for the attachments of the generated pages.
+    Every distinct graphic is written once to the store folder, named by the
+    SHA-256 of its content, and hard linked (or copied, if the file system
+    does not support hard links) into the folders of the pages using it.
+    The store can be kept between runs, so graphics that are already known
+    are never written again. The blobs are read-only, so that they cannot be
+    changed through the hard links.
+    '''
+    READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+    def __init__(self, path) -> None:
+        self.path = path
+
+    def add(self, graphic : MarkdownGraphic) -> str:
+        '''
+        Stores the graphic unless the store already has its content. Returns the path in the store.
+        '''
+        with graphic.open() as data:
+            digest = self.get_hash(data)
+        extension = os.path.splitext(graphic.src or '')[1]
+        blob_path = os.path.join(self.path, digest + extension)
+        if self.is_valid(blob_path, digest):
+            return blob_path
+
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                graphic.write_to(tmp_file)
+            os.chmod(tmp_path, self.READ_ONLY)
+            os.replace(tmp_path, blob_path)
+        except:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob_path
+
+    @staticmethod
+    def get_hash(data) -> str:
+        sha = hashlib.sha256()
+        for chunk in iter(lambda: data.read(1024 * 1024), b''):
+            sha.update(chunk)
+        return sha.hexdigest()
+
+    def is_valid(self, blob_path, digest) -> bool:
+        '''
+        True if the store has a blob with this digest. Writable blobs, kept by stores of
+        earlier versions, may have been changed through a hard link and are checked first.
+        '''
+        try:
+            if os.stat(blob_path).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+                with open(blob_path, 'rb') as blob:
+                    if self.get_hash(blob) != digest:
+                        return False
+                os.chmod(blob_path, self.READ_ONLY)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def link(self, blob_path, target_path) -> bool:
+        '''
+        Places the stored file at target_path. Returns False if it is already there.
+        '''
+        if os.path.exists(target_path) and os.path.samefile(blob_path, target_path):
+            return False
+
+        # Link to a temporary name first, so that concurrent writers never see a partial file
+        tmp_path = f'{target_path}.{os.getpid()}.tmp'
+        try:
+            os.link(blob_path, tmp_path)
+        except OSError:
+            with open(blob_path, 'rb') as blob, open(tmp_path, 'wb') as tmp_file:
+                for chunk in iter(lambda: blob.read(1024 * 1024), b''):
+                    tmp_file.write(chunk)
+        replace_file(tmp_path, target_path)
+        return True
@@ -0,0 +1,182 @@
+from typing import List, Dict, Any
+import os
+import json
+import hashlib
+
+from word2md.index_pages import is_index_page
+from word2md.attachment_store import make_writable
+
+# Increase whenever a change to the converters alters the generated output,
+# so that documents converted by an older version are converted again.
+CONVERTER_VERSION = '2'
+
+MANIFEST_FILE_NAME = '.word2md-manifest.json'
+
+class BuildManifest:
+    '''
+    Persistent record of the Word files converted into a destination folder.
+    The manifest is stored as JSON in the destination folder and has the format
+    {
+        'sources': {
+            Path of the Word file relative to the input folder: {
+                'hash': SHA-256 of the Word file,
+                'converter_version': CONVERTER_VERSION used for the conversion,
+                'options': Conversion options that influence the output,
+                'outputs': List with one entry per generated page
+                [
+                    {
+                        'file': Path of the page relative to the destination,
+                        'title': Title of the page,
+                        'parent': Path of the parent page (e.g. the test case of a test specification) or None,
+                        'attachments': Paths of the attachments relative to the destination,
+                        'date': Date in the header of the page
+                    }
+                ]
+            }
+        }
+    }
+    '''
+
+    def __init__(self, output_dir, options=None) -> None:
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_FILE_NAME)
+        self.options = options or {}
+        self.sources : Dict[str, Dict[str, Any]] = {}
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as manifest_file:
+                self.sources = json.load(manifest_file).get('sources', {})
+        except (OSError, ValueError):
+            self.sources = {}
+
+    def save(self):
+        content = json.dumps({'sources': self.sources}, indent=2, sort_keys=True)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as manifest_file:
+                if manifest_file.read() == content:
+                    return
+        except OSError:
+            pass
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as manifest_file:
+            manifest_file.write(content)
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def file_hash(file_path):
+        sha = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def is_up_to_date(self, source, file_hash) -> bool:
+        entry = self.sources.get(source)
+        if entry is None:
+            return False
+        if entry.get('hash') != file_hash or entry.get('converter_version') != CONVERTER_VERSION or entry.get('options') != self.options:
+            return False
+        return all(os.path.isfile(os.path.join(self.output_dir, f)) for f in self.get_output_files(source))
+
+    def get_output_files(self, source) -> List[str]:
+        files = []
+        for output in self.sources.get(source, {}).get('outputs', []):
+            files.append(output['file'])
+            files.extend(output.get('attachments', []))
+        return files
+
+    def get_dates(self) -> Dict[str, str]:
+        '''
+        Returns the date of the pages of every Word file as it was last converted.
+        '''
+        dates = {}
+        for source, entry in self.sources.items():
+            for output in entry.get('outputs', []):
+                if output.get('date'):
+                    dates[source] = output['date']
+                    break
+        return dates
+
+    def update(self, source, file_hash, outputs : List[Dict[str, Any]]) -> List[str]:
+        '''
+        Records the outputs of a converted Word file. Outputs of a previous
+        conversion that are not generated anymore are deleted and returned.
+        '''
+        old_files = set(self.get_output_files(source))
+        self.sources[source] = {
+            'hash': file_hash,
+            'converter_version': CONVERTER_VERSION,
+            'options': self.options,
+            'outputs': outputs
+        }
+        return self.delete_files(old_files - set(self.get_output_files(source)))
+
+    def invalidate(self, source, outputs : List[Dict[str, Any]] = ()):
+        '''
+        Records a Word file whose conversion failed. It is converted again by the next run,
+        and its previous outputs and the given ones are kept, so that they are still
+        removed with the Word file.
+        '''
+        old_outputs = self.sources.get(source, {}).get('outputs', [])
+        old_files = set(output['file'] for output in old_outputs)
+        self.sources[source] = {
+            'hash': None,
+            'converter_version': CONVERTER_VERSION,
+            'options': self.options,
+            'outputs': old_outputs + [output for output in outputs if output['file'] not in old_files]
+        }
+
+    def remove(self, source) -> List[str]:
+        '''
+        Removes a Word file from the manifest and deletes all of its outputs.
+        '''
+        files = self.get_output_files(source)
+        self.sources.pop(source, None)
+        return self.delete_files(files)
+
+    def remove_missing(self, existing_sources) -> List[str]:
+        deleted = []
+        for source in sorted(set(self.sources) - set(existing_sources)):
+            deleted.extend(self.remove(source))
+        return deleted
+
+    def delete_files(self, files) -> List[str]:
+        # Several Word files in the same folder may produce the same output file
+        claimed_files = set()
+        for source in self.sources:
+            claimed_files.update(self.get_output_files(source))
+
+        deleted = []
+        for f in sorted(set(files) - claimed_files):
+            file_path = os.path.join(self.output_dir, f)
+            try:
+                try:
+                    os.remove(file_path)
+                except PermissionError:
+                    # Read-only hard link to an attachment store on Windows
+                    if not make_writable(file_path):
+                        raise
+                    os.remove(file_path)
+            except FileNotFoundError:
+                continue
+            deleted.append(file_path)
+            self.remove_empty_dirs(os.path.dirname(file_path))
+        return deleted
+
+    def remove_empty_dirs(self, folder):
+        output_dir = os.path.abspath(self.output_dir)
+        folder = os.path.abspath(folder)
+        while folder != output_dir and folder.startswith(output_dir + os.sep):
+            try:
+                # A folder that only has a generated index page is empty as well
+                entries = os.listdir(folder)
+                if len(entries) == 1 and is_index_page(os.path.join(folder, entries[0])):
+                    os.remove(os.path.join(folder, entries[0]))
+                os.rmdir(folder)
+            except OSError:
+                return
+            folder = os.path.dirname(folder)
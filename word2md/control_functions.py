@@ -2,10 +2,11 @@ from typing import List
 from .markdown_document import MarkdownTable
 from word2md.markdown_document import MarkdownDocument, MarkdownSection, MarkdownParagraph
 from word2md.system_configuration import TableBasedConverter
-from word2md.helpers import match_strings
+from word2md.helpers import StringMatcher
 
 class ControlFunctionsConverter(TableBasedConverter):
     CONVERTER_TYPE = 'Control Functions'
+    TABLE_HEADINGS = StringMatcher(['Control Function Input', 'Control Function Output', 'Use Case Example', 'Control Function Identification', 'Algorithms'])
 
     def __init__(self, document, no_emf=False):
         super().__init__(document, no_emf)
@@ -17,9 +18,8 @@ class ControlFunctionsConverter(TableBasedConverter):
         use_cases_sec = None
         cf_id = None
         cf_desc = None
-        for table in tables:
-            heading = self.get_table_heading(table)
-            best_match = match_strings(heading, ['Control Function Input', 'Control Function Output', 'Use Case Example', 'Control Function Identification', 'Algorithms'])
+        best_matches = self.TABLE_HEADINGS.match_all([self.get_table_heading(table) for table in tables])
+        for table, best_match in zip(tables, best_matches):
             if best_match == 'Control Function Input':
                 if inputs_sec is None:
                     inputs_sec = MarkdownSection(heading='Inputs')
@@ -47,6 +47,7 @@ class ControlFunctionsConverter(TableBasedConverter):
                         if not cell.is_heading:
                             code_block = '\n```\n' + cell.text + '\n```\n\n'
                             cell.paragraphs = [MarkdownParagraph(text=code_block, html_text=code_block)]
+                table.invalidate_index()
             self.new_table_section(table, md_doc)
         md_doc.title = 'Control Function ' + cf_id if cf_id else 'Control Function'
         md_doc.short_title = cf_id if cf_id else 'Control Function'
@@ -1,14 +1,21 @@
 from typing import List
-import math
+import io
 import os
+import shutil
+import zipfile
 from datetime import date
 from difflib import SequenceMatcher
 from docx import Document
 from docx.document import Document as Doc
+from docx.oxml.ns import qn
+from docx.oxml.simpletypes import ST_Merge
+from docx.table import _Cell
 import markdown
 from lxml import etree
 import chevron
 
+from word2md import stylesheets, mathml_cache
+from word2md.numbering import NumberingIndex, NumberingLevel
 from word2md.markdown_document import (
     MarkdownDocument, 
     MarkdownParagraph,
@@ -19,6 +26,29 @@ from word2md.markdown_document import (
     MarkdownTableCell
 )
 
+# Folder of the graphics in the zip package of a Word file
+MEDIA_FOLDER = 'word/media/'
+
+def open_document(docx) -> Doc:
+    '''
+    Opens a Word file (path or file-like object) with python-docx without reading its
+    graphics into memory: the package is copied without the content of the files in
+    word/media/, so the graphics are loaded as empty parts. Their content has to be read
+    from the Word file itself, see MarkdownGraphic.bind_source().
+    '''
+    if hasattr(docx, 'seek'):
+        docx.seek(0)
+    package = io.BytesIO()
+    with zipfile.ZipFile(docx) as docx_zip, zipfile.ZipFile(package, 'w') as package_zip:
+        for info in docx_zip.infolist():
+            if info.filename.startswith(MEDIA_FOLDER):
+                package_zip.writestr(info.filename, b'')
+                continue
+            with docx_zip.open(info) as source, package_zip.open(info.filename, 'w') as target:
+                shutil.copyfileobj(source, target)
+    package.seek(0)
+    return Document(package)
+
 class Word2MDConverter:
     CONVERTER_TYPE = 'Test Case'
 
@@ -29,9 +59,15 @@ class Word2MDConverter:
             self.document = Document(document)
         self.no_emf = no_emf
         self.is_extension = False
+        self.numbering_indexes = {}
 
-        self.mml_transform = etree.XSLT(etree.parse(os.path.join(os.path.dirname(__file__), 'xsl', 'omml2mml_v2.xsl')))
-        self.remove_namespaces = etree.XSLT(etree.parse(os.path.join(os.path.dirname(__file__), 'xsl', 'remove_namespaces.xsl')))
+    @property
+    def mml_transform(self) -> etree.XSLT:
+        return stylesheets.get_stylesheet(stylesheets.OMML2MML)
+
+    @property
+    def remove_namespaces(self) -> etree.XSLT:
+        return stylesheets.get_stylesheet(stylesheets.REMOVE_NAMESPACES)
 
     def convert(self) -> List[MarkdownDocument]:
         '''
@@ -68,23 +104,49 @@ class Word2MDConverter:
     
     def parse_table(self, table) -> MarkdownTable:
         raw_table = MarkdownTable()
-        for r, row in enumerate(table.rows):
+        for r, raw_cells in enumerate(self.get_table_cells(table)):
             raw_row = MarkdownTableRow()
-            for c, cell in enumerate(self.get_raw_cells(row)):
+            for c, cell in enumerate(raw_cells):
                 raw_cell = MarkdownTableCell(is_heading=self.is_heading(cell['this'], r, c), paragraphs=self.get_cell_contents(cell['this']), colspan=cell['colspan'])
                 raw_row.cells.append(raw_cell)
             raw_table.rows.append(raw_row)
         return raw_table
-    
-    def get_raw_cells(self, row):
-        cells = []
-        row_cells = row.cells
-        for c in row_cells:
-            if len(cells) == 0 or c != cells[-1]['this']:
-                cell = {'this': c, 'colspan': row_cells.count(c)}
-                cells.append(cell)
-        return cells
 
+    def get_table_cells(self, table):
+        '''
+        Returns the cells of each row of a table as a list of {'this': Cell, 'colspan': Number of grid columns}.
+        The w:tr/w:tc elements are read in one pass, resolving w:gridSpan and w:vMerge in the
+        same way as the cell grid of python-docx, without building the grid for every row.
+        '''
+        tbl = table._tbl
+        col_count = tbl.col_count
+
+        grid = []
+        cells = {}
+        for tc in tbl.iter_tcs():
+            is_continued = tc.vMerge == ST_Merge.CONTINUE
+            for grid_span_idx in range(tc.grid_span):
+                if is_continued:
+                    grid.append(grid[-col_count])
+                elif grid_span_idx > 0:
+                    grid.append(grid[-1])
+                else:
+                    grid.append(tc)
+                    cells[tc] = _Cell(tc, table)
+
+        rows = []
+        for r in range(len(tbl.tr_lst)):
+            row_tcs = grid[r * col_count:(r + 1) * col_count]
+            colspans = {}
+            for tc in row_tcs:
+                colspans[tc] = colspans.get(tc, 0) + 1
+            raw_cells = []
+            for c, tc in enumerate(row_tcs):
+                if c == 0 or tc is not row_tcs[c - 1]:
+                    raw_cells.append({'this': cells[tc], 'colspan': colspans[tc]})
+            rows.append(raw_cells)
+        return rows
+    
     def is_heading(self, cell, row_nr, col_nr):
         raise RuntimeError(f'{self.__class__.__name__} must implement the method {self.is_heading.__name__}.')
    
@@ -106,40 +168,34 @@ class Word2MDConverter:
         return fmt is not None and fmt != 'bullet'
 
     def get_numbering_level(self, paragraph):
-        lvl = self.get_numbering_lvl(paragraph)
-        if lvl is not None:
-            try:
-                lvl_indent = lvl.find('w:pPr/w:ind', namespaces=lvl.nsmap)
-                if lvl_indent is not None:
-                    level = math.floor(lvl_indent.left / 500000) + 1
-                else:
-                    level = int(self.get_value_of_attribute(lvl, 'ilvl')) + 1
-
-                return level
-            except:
-                pass
+        num_level = self.get_paragraph_numbering(paragraph)
+        if num_level is not None:
+            return num_level.level
         return 0
 
     def get_numbering_lvl(self, paragraph):
-        document_part = paragraph.part
-        namespaces = paragraph._element.nsmap
-        w_namespace = namespaces['w']
-        p_numbering = paragraph._element.find('*/w:numPr', namespaces=namespaces)
+        num_level = self.get_paragraph_numbering(paragraph)
+        if num_level is not None:
+            return num_level.element
+        return None
+
+    def get_paragraph_numbering(self, paragraph) -> NumberingLevel:
+        p_numbering = paragraph._element.find('*/w:numPr', namespaces=paragraph._element.nsmap)
         if p_numbering is not None:
-            att_val = '{' + w_namespace + '}val'
-            ilvl = p_numbering.find('w:ilvl', namespaces=namespaces)
-            numId = p_numbering.find('w:numId', namespaces=namespaces)
+            ilvl = p_numbering.find(qn('w:ilvl'))
+            numId = p_numbering.find(qn('w:numId'))
             if ilvl is not None and numId is not None:
-                abstract_num_id = document_part.numbering_part.element.find(
-                    'w:num[@w:numId="' + self.get_attr_val(numId) + '"]/w:abstractNumId', 
-                    namespaces=namespaces)
-                if abstract_num_id is not None:
-                    xpath_str = ('w:abstractNum[@w:abstractNumId="' + self.get_attr_val(abstract_num_id) + '"]' + 
-                        '/w:lvl[@w:ilvl="' + self.get_attr_val(ilvl) + '"]')
-                    num_level = document_part.numbering_part.element.find(xpath_str, namespaces=namespaces)
-                    return num_level
+                numbering_index = self.get_numbering_index(paragraph.part)
+                return numbering_index.get_level(numId.get(qn('w:val')), ilvl.get(qn('w:val')))
         return None
 
+    def get_numbering_index(self, document_part) -> NumberingIndex:
+        numbering_index = self.numbering_indexes.get(document_part)
+        if numbering_index is None:
+            numbering_index = NumberingIndex(document_part.numbering_part.element)
+            self.numbering_indexes[document_part] = numbering_index
+        return numbering_index
+
     def get_attr_val(self, element):
         return self.get_value_of_attribute(element, 'val')
 
@@ -150,12 +206,9 @@ class Word2MDConverter:
         return element.get(attribute)
 
     def get_numbering_format(self, paragraph):
-        num_level = self.get_numbering_lvl(paragraph)
+        num_level = self.get_paragraph_numbering(paragraph)
         if num_level is not None:
-            xpath_str = 'w:numFmt'
-            num_fmt = num_level.find(xpath_str, namespaces=num_level.nsmap)
-            if num_fmt is not None:
-                return self.get_attr_val(num_fmt)
+            return num_level.num_fmt
         return None    
 
     def get_cell_contents(self, cell, lineseparator='\n') -> List[MarkdownParagraph]:
@@ -223,7 +276,7 @@ class Word2MDConverter:
             if self.no_emf:
                 if '.' in image_name and image_name.endswith('.emf'):
                     image_name = '.'.join(image_name.split('.')[:-1]) + '.png'
-            graphic = MarkdownGraphic(name=image_name, src=image_path, data=image_part._blob)
+            graphic = MarkdownGraphic(name=image_name, src=image_path, part_name=image_part.partname.lstrip('/'), part=image_part)
             graphics.append(graphic)
             
         return graphics
@@ -235,11 +288,9 @@ class Word2MDConverter:
             return []
         
         equations = []
+        cache = mathml_cache.get_cache()
         for equation in element.findall('*//m:oMath', namespaces=element.nsmap):
-            eq = {}
-            mml = self.mml_transform(equation)
-            mml = self.remove_namespaces(mml.getroot())
-            mml = etree.tostring(mml, encoding='unicode')
+            mml = cache.convert(equation)
             eq = MarkdownEquation(mml=mml)
             equations.append(eq)
 
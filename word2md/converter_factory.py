@@ -1,38 +1,116 @@
+from typing import List, NamedTuple, Type
+import zipfile
+from lxml import etree
+from docx.oxml.ns import qn
+
 from word2md.converter_base import Word2MDConverter
 from word2md.test_case import TestCaseConverter
 from word2md.system_configuration import SystemConfigurationConverter
 from word2md.control_functions import ControlFunctionsConverter
 
-def is_tc_doc(document):
-    for t, table in enumerate(document.tables):
-        cell = table.cell(0, 0)
-        if cell.text.strip().lower() == 'name of the test case':
+class ConverterSignature(NamedTuple):
+    first_cell_text : str
+    converter_class : Type[Word2MDConverter]
+    is_extension : bool = False
+
+# A document is converted by the first converter for which any top-level table
+# has the given text in its first cell.
+CONVERTER_SIGNATURES : List[ConverterSignature] = [
+    ConverterSignature('name of the test case', TestCaseConverter),
+    ConverterSignature('system configuration identification', SystemConfigurationConverter, is_extension=True),
+    ConverterSignature('functional description', ControlFunctionsConverter, is_extension=True),
+]
+
+def get_first_cell_text(tbl) -> str:
+    tr = tbl.find(qn('w:tr'))
+    if tr is None:
+        return None
+    tc = tr.find(qn('w:tc'))
+    if tc is None:
+        return None
+    return '\n'.join(get_paragraph_text(p) for p in tc.iterchildren(qn('w:p')))
+
+def get_paragraph_text(p) -> str:
+    text = []
+    for r in p.iterchildren(qn('w:r'), qn('w:hyperlink')):
+        runs = [r] if r.tag == qn('w:r') else r.iterchildren(qn('w:r'))
+        for run in runs:
+            for e in run.iterchildren():
+                if e.tag == qn('w:t'):
+                    text.append(e.text or '')
+                elif e.tag in (qn('w:tab'), qn('w:ptab')):
+                    text.append('\t')
+                elif e.tag == qn('w:cr') or (e.tag == qn('w:br') and e.get(qn('w:type'), 'textWrapping') == 'textWrapping'):
+                    text.append('\n')
+                elif e.tag == qn('w:noBreakHyphen'):
+                    text.append('-')
+    return ''.join(text)
+
+def match_signature(first_cell_texts) -> ConverterSignature:
+    first_cell_texts = [text.strip().lower() for text in first_cell_texts if text is not None]
+    for signature in CONVERTER_SIGNATURES:
+        if signature.first_cell_text in first_cell_texts:
+            return signature
+    return None
+
+def get_signature(document) -> ConverterSignature:
+    '''
+    Returns the signature of the converter for an opened python-docx document.
+    '''
+    return match_signature(get_first_cell_text(table._tbl) for table in document.tables)
+
+def classify_docx(docx) -> ConverterSignature:
+    '''
+    Returns the signature of the converter for a Word file (path or file-like object)
+    without loading the full document. word/document.xml is parsed incrementally and
+    parsing stops at the first table that identifies the highest-priority converter.
+    Raises zipfile.BadZipFile, KeyError or etree.XMLSyntaxError for invalid Word files.
+    '''
+    body_tag = qn('w:body')
+    tbl_tag = qn('w:tbl')
+    best_match = None
+    with zipfile.ZipFile(docx) as docx_zip:
+        with docx_zip.open('word/document.xml') as document_xml:
+            for _, element in etree.iterparse(document_xml, events=('end',), tag=tbl_tag):
+                parent = element.getparent()
+                if parent is None or parent.tag != body_tag:
+                    continue
+                signature = match_signature([get_first_cell_text(element)])
+                if signature is not None:
+                    index = CONVERTER_SIGNATURES.index(signature)
+                    if index == 0:
+                        return signature
+                    if best_match is None or index < CONVERTER_SIGNATURES.index(best_match):
+                        best_match = signature
+                # Drop the parsed content of the body up to this table
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+    return best_match
+
+def has_first_cell(document, first_cell_text):
+    for table in document.tables:
+        text = get_first_cell_text(table._tbl)
+        if text is not None and text.strip().lower() == first_cell_text:
             return True
     return False
 
+def is_tc_doc(document):
+    return has_first_cell(document, 'name of the test case')
+
 def is_sc_doc(document):
-    for t, table in enumerate(document.tables):
-        cell = table.cell(0, 0)
-        if cell.text.strip().lower() == 'system configuration identification':
-            return True
-    return False
+    return has_first_cell(document, 'system configuration identification')
 
 def is_cf_document(document):
-    for t, table in enumerate(document.tables):
-        cell = table.cell(0, 0)
-        if cell.text.strip().lower() == 'functional description':
-            return True
-    return False
+    return has_first_cell(document, 'functional description')
+
+def get_converter(document, no_emf=False, signature=None) -> Word2MDConverter:
+    if signature is None:
+        signature = get_signature(document)
+    if signature is None:
+        return None
 
-def get_converter(document, no_emf=False) -> Word2MDConverter:
-    converter = None
-    if is_tc_doc(document):
-        converter = TestCaseConverter(document, no_emf=no_emf)
-    elif is_sc_doc(document):
-        converter = SystemConfigurationConverter(document, no_emf=no_emf)
-        converter.is_extension = True
-    elif is_cf_document(document):
-        converter = ControlFunctionsConverter(document, no_emf=no_emf)
-        converter.is_extension = True
+    converter = signature.converter_class(document, no_emf=no_emf)
+    converter.is_extension = signature.is_extension
     
     return converter
\ No newline at end of file
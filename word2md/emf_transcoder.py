@@ -0,0 +1,188 @@
+from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+import os
+import zlib
+import struct
+import shutil
+import hashlib
+import logging
+import pathlib
+import tempfile
+import threading
+import subprocess
+
+def get_png_path(emf_path) -> str:
+    '''
+    Path of the PNG for an EMF graphic, as referenced by the pages converted with no_emf.
+    '''
+    return os.path.splitext(emf_path)[0] + '.png'
+
+class LibreOfficeConverter:
+    '''
+    Converts EMF files to PNG with one LibreOffice process per batch and trims
+    the borders of the PNG files with one ImageMagick mogrify process per batch.
+    '''
+    name = 'libreoffice'
+
+    def __init__(self, libreoffice='libreoffice', trim_command=('mogrify', '-trim'), timeout=600) -> None:
+        self.libreoffice = libreoffice
+        self.trim_command = list(trim_command) if trim_command else None
+        self.timeout = timeout
+        # LibreOffice processes can only run in parallel with separate user profiles
+        self.profiles = threading.local()
+        self.profile_root = None
+        self.lock = threading.Lock()
+
+    def get_profile(self) -> str:
+        profile = getattr(self.profiles, 'path', None)
+        if profile is None:
+            with self.lock:
+                if self.profile_root is None:
+                    self.profile_root = tempfile.mkdtemp(prefix='word2md-lo-')
+                profile = self.profiles.path = tempfile.mkdtemp(dir=self.profile_root)
+        return profile
+
+    def convert_batch(self, emf_files : List[str], output_dir):
+        subprocess.run([self.libreoffice, f'-env:UserInstallation={pathlib.Path(self.get_profile()).as_uri()}',
+                        '--nologo', '--norestore', '--invisible', '--headless', '--convert-to', 'png', '--outdir', output_dir] + emf_files,
+                       check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, timeout=self.timeout)
+        png_files = [p for p in map(get_png_path, (os.path.join(output_dir, os.path.basename(f)) for f in emf_files)) if os.path.isfile(p)]
+        if self.trim_command and png_files:
+            subprocess.run(self.trim_command + png_files, check=True, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, timeout=self.timeout)
+
+    def close(self):
+        with self.lock:
+            if self.profile_root is not None:
+                shutil.rmtree(self.profile_root, ignore_errors=True)
+                self.profile_root = None
+            self.profiles = threading.local()
+
+class StubConverter:
+    '''
+    Writes a 1x1 pixel PNG for every EMF file, for tests and builds without LibreOffice.
+    The batches it received are kept in batches.
+    '''
+    name = 'stub'
+
+    def __init__(self) -> None:
+        self.batches : List[List[str]] = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def create_png() -> bytes:
+        def chunk(chunk_type, data):
+            return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff)
+        header = struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0)
+        return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(b'\x00\xff\xff\xff')) + chunk(b'IEND', b'')
+
+    def convert_batch(self, emf_files : List[str], output_dir):
+        with self.lock:
+            self.batches.append(list(emf_files))
+        for emf_file in emf_files:
+            with open(get_png_path(os.path.join(output_dir, os.path.basename(emf_file))), 'wb') as f:
+                f.write(self.create_png())
+
+    def close(self):
+        pass
+
+CONVERTERS = {
+    LibreOfficeConverter.name: LibreOfficeConverter,
+    StubConverter.name: StubConverter,
+}
+
+class EMFTranscoder:
+    '''
+    Converts EMF graphics to PNG files next to them. Graphics with the same content
+    are converted once, in batches that are distributed over worker threads, each
+    running one converter process per batch. If a cache folder is given, the PNG
+    files are kept there by the SHA-256 of the EMF content, so that graphics that
+    did not change are never converted again.
+    '''
+
+    def __init__(self, converter=None, cache_path=None, batch_size=50, workers=1) -> None:
+        self.converter = converter or LibreOfficeConverter()
+        self.cache_path = cache_path
+        self.batch_size = max(1, batch_size)
+        self.workers = max(1, workers)
+
+    def get_key(self, emf_file) -> str:
+        sha = hashlib.sha256(self.converter.name.encode('ascii'))
+        with open(emf_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def get_cached(self, key):
+        if self.cache_path is None:
+            return None
+        png_path = os.path.join(self.cache_path, key + '.png')
+        return png_path if os.path.isfile(png_path) else None
+
+    def transcode(self, emf_files : List[str]) -> Dict[str, str]:
+        '''
+        Converts the EMF files and returns the path of the PNG file for every EMF
+        file that could be converted.
+        '''
+        targets : Dict[str, List[str]] = {}
+        for emf_file in emf_files:
+            targets.setdefault(self.get_key(emf_file), []).append(emf_file)
+
+        png_files = {}
+        missing = []
+        for key, key_files in targets.items():
+            cached = self.get_cached(key)
+            if cached is None:
+                missing.append(key)
+            else:
+                png_files.update(self.place(cached, key_files))
+        if len(missing) < len(targets):
+            logging.info(f'{len(targets) - len(missing)} EMF graphics taken from the cache')
+        if not missing:
+            return png_files
+
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        try:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(batches))) as executor:
+                for batch_png_files in executor.map(lambda batch: self.convert_batch(batch, targets), batches):
+                    png_files.update(batch_png_files)
+        finally:
+            self.converter.close()
+        return png_files
+
+    def convert_batch(self, keys : List[str], targets : Dict[str, List[str]]) -> Dict[str, str]:
+        png_files = {}
+        with tempfile.TemporaryDirectory(prefix='word2md-emf-') as work_dir:
+            # The files are named by their key, as graphics of different pages often have the same name
+            batch_files = []
+            for key in keys:
+                batch_file = os.path.join(work_dir, key + '.emf')
+                shutil.copyfile(targets[key][0], batch_file)
+                batch_files.append(batch_file)
+            logging.info(f'Converting {len(batch_files)} EMF graphics with {self.converter.name}')
+            try:
+                self.converter.convert_batch(batch_files, work_dir)
+            except (OSError, subprocess.SubprocessError) as e:
+                logging.error(f'ERROR: Could not convert EMF graphics: {e}')
+
+            for key, batch_file in zip(keys, batch_files):
+                png_file = get_png_path(batch_file)
+                if not os.path.isfile(png_file):
+                    logging.error(f'ERROR: Could not convert {", ".join(targets[key])}')
+                    continue
+                if self.cache_path is not None:
+                    os.makedirs(self.cache_path, exist_ok=True)
+                    cached = os.path.join(self.cache_path, key + '.png')
+                    # The cache may be on another file system and shared with other processes
+                    tmp_path = f'{cached}.{os.getpid()}.{threading.get_ident()}.tmp'
+                    shutil.copyfile(png_file, tmp_path)
+                    os.replace(tmp_path, cached)
+                    png_file = cached
+                png_files.update(self.place(png_file, targets[key]))
+        return png_files
+
+    def place(self, png_file, emf_files) -> Dict[str, str]:
+        png_files = {}
+        for emf_file in emf_files:
+            png_files[emf_file] = get_png_path(emf_file)
+            shutil.copyfile(png_file, png_files[emf_file])
+        return png_files
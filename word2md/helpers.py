@@ -1,12 +1,33 @@
+from typing import List, Optional
 from difflib import SequenceMatcher
+import threading
+
+SIMILARITY_THRESHOLD = 0.8
+# Threshold of the n-gram similarity that gives about the same matches as SIMILARITY_THRESHOLD for bigrams
+NGRAM_SIMILARITY_THRESHOLD = 0.6
+
+def normalize_string(s):
+    return s.strip().lower()
+
+def is_junk(c):
+    return c in ' \t'
 
 def compare_strings(s1, s2):
-    s = SequenceMatcher(lambda x: x in ' \t', s1.strip().lower(), s2.strip().lower())
+    s = SequenceMatcher(is_junk, normalize_string(s1), normalize_string(s2))
     return s.ratio()
 
+def max_ratio(len1, len2):
+    '''
+    Upper bound of compare_strings for normalized strings of the given lengths:
+    at most all characters of the shorter string match.
+    '''
+    if len1 + len2 == 0:
+        return 1.0
+    return 2.0 * min(len1, len2) / (len1 + len2)
+
 def strings_equal(s1, s2):
     if type(s1) == str and type(s2) == str:
-        return compare_strings(s1, s2) > 0.8
+        return compare_strings(s1, s2) > SIMILARITY_THRESHOLD
     return False
 
 def match_strings(string, strings_to_match):
@@ -14,4 +35,117 @@ def match_strings(string, strings_to_match):
     best_match = max(string_ratios, key=lambda x: x['ratio'])
     if strings_equal(string, best_match['string']):
         return best_match['string']
-    return None
\ No newline at end of file
+    return None
+
+def ngrams(s, n) -> frozenset:
+    s = f' {s} '
+    return frozenset(s[i:i + n] for i in range(max(1, len(s) - n + 1)))
+
+class StringMatcher:
+    '''
+    Compares strings against a fixed list of candidates, which are normalized
+    and prepared once.
+
+    method 'sequence' (default) gives the same ratios as compare_strings and
+    the same results as strings_equal and match_strings. Candidates whose ratio
+    cannot exceed the threshold or the best ratio so far are skipped using the
+    quick upper bounds of SequenceMatcher.
+
+    method 'ngram' scores with the Dice coefficient of the sets of character
+    n-grams instead, which is faster, but does not reproduce the SequenceMatcher
+    ratios. Its default threshold is NGRAM_SIMILARITY_THRESHOLD.
+    '''
+    SEQUENCE = 'sequence'
+    NGRAM = 'ngram'
+
+    def __init__(self, candidates, method=SEQUENCE, threshold=None, ngram_size=2) -> None:
+        if method not in (self.SEQUENCE, self.NGRAM):
+            raise ValueError(f'Unknown method "{method}"')
+        self.candidates = list(candidates)
+        self.method = method
+        if threshold is None:
+            threshold = SIMILARITY_THRESHOLD if method == self.SEQUENCE else NGRAM_SIMILARITY_THRESHOLD
+        self.threshold = threshold
+        self.ngram_size = ngram_size
+        if method == self.SEQUENCE:
+            # SequenceMatcher caches its analysis of the second sequence. As score() changes
+            # the first sequence, every thread prepares its own matchers (see get_matchers).
+            self.local = threading.local()
+        else:
+            self.ngrams = [ngrams(normalize_string(c), ngram_size) if type(c) == str else None for c in self.candidates]
+
+    def scores(self, string) -> List[float]:
+        '''
+        Returns the similarity of string to every candidate (0.0 for candidates or strings that are no strings).
+        '''
+        prepared = self.prepare(string)
+        return [self.score(i, prepared) for i in range(len(self.candidates))]
+
+    def is_equal(self, string) -> List[bool]:
+        '''
+        Returns for every candidate whether its similarity to string is above the threshold, like strings_equal.
+        '''
+        prepared = self.prepare(string)
+        return [self.score(i, prepared, self.threshold) > self.threshold for i in range(len(self.candidates))]
+
+    def match(self, string) -> Optional[str]:
+        '''
+        Returns the first candidate with the highest similarity to string if
+        it is above the threshold, like match_strings, or None.
+        '''
+        prepared = self.prepare(string)
+        best_score = self.threshold
+        best_match = None
+        for i in range(len(self.candidates)):
+            # A later candidate has to be strictly better to replace the best match
+            score = self.score(i, prepared, best_score)
+            if score > best_score:
+                best_score = score
+                best_match = self.candidates[i]
+        return best_match
+
+    def match_all(self, strings) -> List[Optional[str]]:
+        return [self.match(s) for s in strings]
+
+    def is_equal_all(self, strings) -> List[List[bool]]:
+        return [self.is_equal(s) for s in strings]
+
+    def prepare(self, string):
+        if type(string) != str:
+            return None
+        normalized = normalize_string(string)
+        if self.method == self.NGRAM:
+            return ngrams(normalized, self.ngram_size)
+        return normalized
+
+    def get_matchers(self) -> List[Optional[SequenceMatcher]]:
+        matchers = getattr(self.local, 'matchers', None)
+        if matchers is None:
+            matchers = self.local.matchers = []
+            for candidate in self.candidates:
+                matcher = None
+                if type(candidate) == str:
+                    matcher = SequenceMatcher(is_junk)
+                    matcher.set_seq2(normalize_string(candidate))
+                matchers.append(matcher)
+        return matchers
+
+    def score(self, i, prepared, lower_bound=None) -> float:
+        '''
+        Similarity of the prepared string to candidate i. If the similarity cannot
+        exceed lower_bound, an upper bound of it may be returned instead.
+        '''
+        if prepared is None or type(self.candidates[i]) != str:
+            return 0.0
+        if self.method == self.NGRAM:
+            candidate_ngrams = self.ngrams[i]
+            return 2.0 * len(candidate_ngrams & prepared) / (len(candidate_ngrams) + len(prepared))
+
+        matcher = self.get_matchers()[i]
+        matcher.set_seq1(prepared)
+        if lower_bound is not None:
+            for upper_bound in (matcher.real_quick_ratio, matcher.quick_ratio):
+                ratio = upper_bound()
+                if ratio <= lower_bound:
+                    return ratio
+        return matcher.ratio()
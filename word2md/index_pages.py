@@ -0,0 +1,56 @@
+from typing import Iterable, List, Set
+import os
+import logging
+
+INDEX_FILE_NAMES = ('_index.md', 'index.md')
+INDEX_PAGE_WEIGHT = 5
+
+def render_index_page(folder_name) -> str:
+    '''
+    Page that gives a folder without a page of its own a title in Hugo.
+    '''
+    title = folder_name.replace('\\', '\\\\').replace('"', '\\"')
+    return f'---\ntitle: "{title}"\nlinkTitle: "{title}"\nweight: {INDEX_PAGE_WEIGHT}\n---\n'
+
+def get_folders(output_dir) -> Set[str]:
+    '''
+    Returns all folders below output_dir, without the hidden folders directly in it.
+    '''
+    folders = set()
+    for folder, sub_folders, _ in os.walk(output_dir):
+        if folder == output_dir:
+            sub_folders[:] = [f for f in sub_folders if not f.startswith('.')]
+        folders.update(os.path.join(folder, f) for f in sub_folders)
+    return folders
+
+def has_index_page(folder) -> bool:
+    return any(os.path.isfile(os.path.join(folder, name)) for name in INDEX_FILE_NAMES)
+
+def is_index_page(file_path) -> bool:
+    '''
+    True if file_path is an index page as written by write_index_pages.
+    '''
+    if os.path.basename(file_path) != INDEX_FILE_NAMES[0]:
+        return False
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return f.read() == render_index_page(os.path.basename(os.path.dirname(os.path.abspath(file_path))))
+    except (OSError, UnicodeDecodeError):
+        return False
+
+def write_index_pages(folders : Iterable[str]) -> List[str]:
+    '''
+    Writes an index page into every folder that has no _index.md or index.md yet.
+    Returns the paths of the written pages.
+    '''
+    written = []
+    for folder in sorted(folders):
+        if not os.path.isdir(folder) or has_index_page(folder):
+            continue
+        folder_name = os.path.basename(folder)
+        logging.info(f'Creating title link for directory: {folder} with title: {folder_name}')
+        index_path = os.path.join(folder, INDEX_FILE_NAMES[0])
+        with open(index_path, 'w', encoding='utf-8') as f:
+            f.write(render_index_page(folder_name))
+        written.append(index_path)
+    return written
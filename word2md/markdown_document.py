@@ -1,23 +1,95 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, BinaryIO
 from dataclasses import dataclass, field
+import io
 import json
+import shutil
+import zipfile
 
-import markdown
-
-from word2md.helpers import strings_equal
+from word2md.helpers import strings_equal, normalize_string, max_ratio, StringMatcher
+from word2md import markdown_engine
 
 class MarkdownBase:
+    # Internal attributes (e.g. caches) that are not part of the encoded object
+    ENCODE_EXCLUDE = ()
+
     def encode(self):
-        return vars(self)
+        d = vars(self).copy()
+        for key in self.ENCODE_EXCLUDE:
+            d.pop(key, None)
+        return d
     
-    def to_dict(self):
-        return json.loads(json.dumps(self, default=lambda mb: mb.encode()))
+    def to_dict(self, skip_keys=()):
+        return TreeEncoder(skip_keys=skip_keys).encode(self)
         
     def json_dumper(self, o):
         if isinstance(o, MarkdownBase):
             return o.encode()
         return o
     
+class TreeEncoder:
+    '''
+    Converts a tree of MarkdownBase objects into plain dicts and lists in a single
+    pass, e.g. as render context for the mustache templates. The result is the same
+    as serializing the tree to JSON with encode() and parsing it again. Each object
+    is encoded once per encoder, so derived properties like markdown_text are only
+    computed once even if an object is reachable several times (e.g. via parent_docs).
+    Attributes named in skip_keys are left out on all levels of the tree.
+    '''
+
+    SCALAR_TYPES = frozenset([str, int, float, bool, type(None)])
+
+    def __init__(self, skip_keys=()) -> None:
+        self.encoded = {}
+        self.skip_keys = skip_keys
+
+    def encode(self, value):
+        value_type = type(value)
+        if value_type in self.SCALAR_TYPES:
+            return value
+        if value_type is list or value_type is tuple:
+            return self.encode_list(value)
+        if isinstance(value, MarkdownBase):
+            return self.encode_object(value)
+        if isinstance(value, dict):
+            return {self.encode_key(key): self.encode(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return self.encode_list(value)
+        if isinstance(value, (str, int, float)):
+            return value
+        raise TypeError(f'Object of type {value_type.__name__} cannot be encoded')
+
+    def encode_object(self, value):
+        encoded = self.encoded.get(id(value))
+        if encoded is None:
+            scalar_types = self.SCALAR_TYPES
+            encoded = self.encoded[id(value)] = value.encode()
+            for key in self.skip_keys:
+                encoded.pop(key, None)
+            for key, item in encoded.items():
+                item_type = type(item)
+                if item_type is list:
+                    encoded[key] = self.encode_list(item)
+                elif item_type not in scalar_types:
+                    encoded[key] = self.encode(item)
+        return encoded
+
+    def encode_list(self, values):
+        scalar_types = self.SCALAR_TYPES
+        encoded = []
+        for item in values:
+            if type(item) in scalar_types:
+                encoded.append(item)
+            elif isinstance(item, MarkdownBase):
+                encoded.append(self.encode_object(item))
+            else:
+                encoded.append(self.encode(item))
+        return encoded
+
+    def encode_key(self, key):
+        if isinstance(key, str):
+            return key
+        return json.dumps(key)
+
 @dataclass
 class MarkdownDocument(MarkdownBase):
     title : str = None
@@ -30,9 +102,21 @@ class MarkdownDocument(MarkdownBase):
     source_file : str = None
     is_extension : bool = False
 
+    ENCODE_EXCLUDE = ('_attachments',)
+
     @property
     def attachments(self) -> List['MarkdownGraphic']:
-        return self.collect_attachments()
+        '''
+        Graphics of all sections, collected on first access. Call invalidate_attachments()
+        after adding or removing graphics once the document has been converted.
+        '''
+        attachments = getattr(self, '_attachments', None)
+        if attachments is None:
+            attachments = self._attachments = self.collect_attachments()
+        return attachments
+
+    def invalidate_attachments(self):
+        self._attachments = None
 
     def collect_attachments(self):
         attachments = []
@@ -51,7 +135,7 @@ class MarkdownDocument(MarkdownBase):
     
     def encode(self):
         d = super().encode()
-        d['attachments'] = [a.to_dict() for a in self.attachments]
+        d['attachments'] = self.attachments
         return d
 
 @dataclass
@@ -103,7 +187,7 @@ class MarkdownParagraph(MarkdownBase):
         return self.do_markdown(self.text)
 
     def do_markdown(self, text):
-        return markdown.markdown(text)
+        return markdown_engine.to_html(text)
     
     def encode(self):
         d = super().encode()
@@ -117,6 +201,45 @@ class MarkdownGraphic(MarkdownBase):
     src : str = None
     data : bytes = None
 
+    # Lazy reference to the graphic in the Word file, used if data is None:
+    # the Word file (path or file-like object) and the name of the part in its zip package
+    source : Any = field(default=None, repr=False, compare=False)
+    part_name : str = None
+    # python-docx part of the graphic, until the graphic is bound to its source
+    part : Any = field(default=None, repr=False, compare=False)
+
+    def bind_source(self, source):
+        '''
+        Reads the graphic from the given Word file from now on, so that the
+        python-docx package and its blobs do not have to be kept in memory.
+        '''
+        if self.part_name:
+            self.source = source
+            self.part = None
+
+    def open(self) -> BinaryIO:
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        if self.source is not None and self.part_name:
+            if hasattr(self.source, 'seek'):
+                self.source.seek(0)
+            with zipfile.ZipFile(self.source) as docx_zip:
+                return docx_zip.open(self.part_name)
+        if self.part is not None:
+            return io.BytesIO(self.part.blob)
+        return io.BytesIO()
+
+    def read(self) -> bytes:
+        with self.open() as graphic:
+            return graphic.read()
+
+    def write_to(self, fileobj : BinaryIO):
+        '''
+        Copies the graphic into fileobj in chunks, without reading it into memory as a whole.
+        '''
+        with self.open() as graphic:
+            shutil.copyfileobj(graphic, fileobj)
+
     def encode(self):
         return {'name': self.name, 'src': self.src, 'data': '--'}
 
@@ -124,9 +247,84 @@ class MarkdownGraphic(MarkdownBase):
 class MarkdownEquation(MarkdownBase):
     mml : str = None
 
+class TableLabelIndex:
+    '''
+    Finds the cells of a table whose text matches a label like strings_equal does.
+    Cells with the same normalized text as the label are looked up in a dict, the
+    other cells are only compared if their normalized text has a length that allows
+    a ratio above 0.8. The matches of every label are kept, in the order in which
+    get_cell_content scans the table, so repeated lookups are dict lookups.
+    '''
+
+    def __init__(self, table : 'MarkdownTable') -> None:
+        self.texts = [[cell.text for cell in row.cells] for row in table.rows]
+        # Cells in the order get_cell_content scans them: (row, column, text, normalized text)
+        self.cells = []
+        self.cells_by_text : Dict[str, List[tuple]] = {}
+        self.cells_by_length : Dict[int, List[int]] = {}
+        self.matches : Dict[str, List[tuple]] = {}
+        for r, row_texts in enumerate(self.texts):
+            for c, text in enumerate(row_texts):
+                normalized = normalize_string(text) if type(text) == str else None
+                if normalized is not None:
+                    self.cells_by_text.setdefault(normalized, []).append((r, c))
+                    self.cells_by_length.setdefault(len(normalized), []).append(len(self.cells))
+                self.cells.append((r, c, text, normalized))
+
+    def find(self, text_to_find) -> List[tuple]:
+        '''
+        Returns the positions (row, column) of all cells matching text_to_find in scan order.
+        '''
+        matches = self.matches.get(text_to_find)
+        if matches is None:
+            matches = self.matches[text_to_find] = self.find_uncached(text_to_find)
+        return matches
+
+    def find_uncached(self, text_to_find) -> List[tuple]:
+        if type(text_to_find) != str:
+            return []
+        normalized_to_find = normalize_string(text_to_find)
+        exact_matches = self.cells_by_text.get(normalized_to_find, [])
+
+        length = len(normalized_to_find)
+        candidates = []
+        for cell_length, indexes in self.cells_by_length.items():
+            if max_ratio(cell_length, length) > 0.8:
+                candidates.extend(indexes)
+
+        # A cell with a similar text may come before or after the cells with the same text
+        similar_matches = []
+        label_matcher = StringMatcher([text_to_find])
+        for i in candidates:
+            r, c, text, normalized = self.cells[i]
+            if normalized != normalized_to_find and label_matcher.is_equal(text)[0]:
+                similar_matches.append((r, c))
+        return sorted(exact_matches + similar_matches)
+
 @dataclass
 class MarkdownTable(MarkdownBase):
     rows : List['MarkdownTableRow'] = field(default_factory=list)
+
+    ENCODE_EXCLUDE = ('_label_index',)
+
+    @property
+    def label_index(self) -> TableLabelIndex:
+        '''
+        Index of the cell texts, built on first use. Call invalidate_index() after
+        changing the rows, cells or paragraphs of the table other than with add_simple_row().
+        '''
+        if getattr(self, '_label_index', None) is None:
+            self._label_index = TableLabelIndex(self)
+        return self._label_index
+
+    def invalidate_index(self):
+        '''
+        Drops the index and the cached texts of the cells.
+        '''
+        self._label_index = None
+        for row in self.rows:
+            for cell in row.cells:
+                cell.invalidate_text()
     
     def add_simple_row(self, *args, row_nr=-1, heading_cols=[], replace=False):
         heading_cols = [heading_cols] if not type(heading_cols) == list else heading_cols
@@ -143,18 +341,21 @@ class MarkdownTable(MarkdownBase):
                 self.rows.insert(row_nr, row)
         else:
             self.rows.append(row)
+        self.invalidate_index()
 
     def get_cell_content(self, text_to_find, col_delta=1, row_delta=0, compare_callable=None):
-        compare_callable = compare_callable or strings_equal
-
-        for r, row in enumerate(self.rows):
-            cells = row.cells
-            for c, cell in enumerate(cells):
-                if compare_callable(cell.text, text_to_find):
-                    row_data = r + row_delta
-                    cells_data = c + col_delta
-                    if len(self.rows) > row_data and row_data >= 0 and len(self.rows[row_data].cells) > cells_data and cells_data >= 0:
-                        return self.rows[row_data].cells[cells_data].text
+        label_index = self.label_index
+        texts = label_index.texts
+        if compare_callable is None or compare_callable is strings_equal:
+            matches = label_index.find(text_to_find)
+        else:
+            matches = [(r, c) for r, row_texts in enumerate(texts) for c, text in enumerate(row_texts) if compare_callable(text, text_to_find)]
+
+        for r, c in matches:
+            row_data = r + row_delta
+            cells_data = c + col_delta
+            if len(texts) > row_data and row_data >= 0 and len(texts[row_data]) > cells_data and cells_data >= 0:
+                return texts[row_data][cells_data]
         return None
 
 
@@ -178,9 +379,24 @@ class MarkdownTableCell(MarkdownParagraphContainer):
     is_heading : bool = False
     colspan : int = 1
 
+    ENCODE_EXCLUDE = ('_text',)
+
     @property
     def text(self) -> str:
-        return '\n'.join([p.text for p in self.paragraphs])
+        '''
+        Text of the paragraphs, cached until invalidate_text() is called.
+        '''
+        text = getattr(self, '_text', None)
+        if text is None:
+            text = self._text = '\n'.join([p.text for p in self.paragraphs])
+        return text
+
+    def invalidate_text(self):
+        self._text = None
+
+    def add_simple_paragraph(self, text, position=-1, replace=False):
+        super().add_simple_paragraph(text, position=position, replace=replace)
+        self.invalidate_text()
     
     def encode(self):
         d = super().encode()
@@ -0,0 +1,48 @@
+import re
+import threading
+from functools import lru_cache
+
+import markdown
+
+# Single line of text without Markdown syntax: letters, digits, spaces and
+# punctuation that Markdown leaves untouched. It starts with a letter or digit,
+# but not like an ordered list item ("1. ..."), and does not end with a space.
+PLAIN_TEXT_REGEX = re.compile(r'(?!\d+\.[ ])[^\W_](?:[^\W_]|[ ,.;:?%/\'"+=-])*(?<![ ])')
+
+# Only short strings (e.g. "N/A", "Yes", units) are repeated often enough to be cached
+CACHE_MAX_LENGTH = 256
+CACHE_SIZE = 4096
+
+_local = threading.local()
+
+def get_markdown() -> markdown.Markdown:
+    '''
+    Returns the Markdown instance of the current thread. Creating a Markdown
+    instance sets up all processors, so it is reused and reset for each conversion.
+    '''
+    md = getattr(_local, 'markdown', None)
+    if md is None:
+        md = markdown.Markdown()
+        _local.markdown = md
+    return md
+
+def is_plain_text(text) -> bool:
+    return PLAIN_TEXT_REGEX.fullmatch(text) is not None
+
+def convert_uncached(text) -> str:
+    if isinstance(text, str) and is_plain_text(text):
+        # Plain text never contains characters that need escaping
+        return f'<p>{text}</p>'
+    return get_markdown().reset().convert(text)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def convert_cached(text) -> str:
+    return convert_uncached(text)
+
+def to_html(text) -> str:
+    '''
+    Converts Markdown text to HTML. The result is identical to markdown.markdown(text).
+    '''
+    if isinstance(text, str) and len(text) <= CACHE_MAX_LENGTH:
+        return convert_cached(text)
+    return convert_uncached(text)
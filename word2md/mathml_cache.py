@@ -0,0 +1,109 @@
+from collections import OrderedDict
+import os
+import hashlib
+import sqlite3
+import threading
+from lxml import etree
+
+from word2md import stylesheets
+
+class MathMLCache:
+    '''
+    Content-addressed cache for the MathML of OMML equations.
+    Entries are kept in memory with LRU eviction and, if a path is given,
+    persisted in a sqlite database that can be shared by several processes.
+    The key is a hash over the stylesheet version and the canonicalized OMML,
+    so entries become invalid as soon as one of the stylesheets changes.
+    '''
+
+    def __init__(self, path=None, max_entries=1024) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.connection = None
+        self.connection_pid = None
+
+    def get_key(self, omml_element) -> str:
+        sha = hashlib.sha256(stylesheets.get_omml_to_mathml_version().encode('ascii'))
+        sha.update(etree.tostring(omml_element, method='c14n', exclusive=True))
+        return sha.hexdigest()
+
+    def convert(self, omml_element) -> str:
+        '''
+        Returns the MathML for an OMML element (m:oMath) and only runs
+        the XSLT transform if the equation is not cached yet.
+        '''
+        key = self.get_key(omml_element)
+        mml = self.get(key)
+        if mml is None:
+            mml = stylesheets.omml_to_mathml(omml_element)
+            self.put(key, mml)
+        return mml
+
+    def get(self, key):
+        with self.lock:
+            mml = self.entries.get(key)
+            if mml is not None:
+                self.entries.move_to_end(key)
+                return mml
+
+        mml = self.db_get(key)
+        if mml is not None:
+            self.remember(key, mml)
+        return mml
+
+    def put(self, key, mml):
+        self.remember(key, mml)
+        self.db_put(key, mml)
+
+    def remember(self, key, mml):
+        with self.lock:
+            self.entries[key] = mml
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_connection(self):
+        if self.path is None:
+            return None
+        # Connections must not be shared with forked worker processes
+        if self.connection is None or self.connection_pid != os.getpid():
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            self.connection.execute('PRAGMA journal_mode=WAL')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS mathml (key TEXT PRIMARY KEY, mml TEXT NOT NULL)')
+            self.connection_pid = os.getpid()
+        return self.connection
+
+    def db_get(self, key):
+        with self.lock:
+            connection = self.get_connection()
+            if connection is None:
+                return None
+            row = connection.execute('SELECT mml FROM mathml WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def db_put(self, key, mml):
+        with self.lock:
+            connection = self.get_connection()
+            if connection is None:
+                return
+            # The value only depends on the key, so concurrent writers can simply ignore each other
+            connection.execute('INSERT OR IGNORE INTO mathml (key, mml) VALUES (?, ?)', (key, mml))
+
+_cache = MathMLCache()
+
+def get_cache() -> MathMLCache:
+    return _cache
+
+def configure(path=None, max_entries=1024) -> MathMLCache:
+    '''
+    Sets up the process-wide cache. If path is None, equations are only cached in memory.
+    '''
+    global _cache
+    if _cache.path != path or _cache.max_entries != max_entries:
+        _cache = MathMLCache(path, max_entries=max_entries)
+    return _cache
@@ -0,0 +1,229 @@
+from typing import Callable, Dict, List, Tuple
+import sys
+import json
+import time
+import pstats
+import cProfile
+import functools
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where the peak RSS is not recorded
+    resource = None
+
+def get_peak_rss():
+    '''
+    Peak resident set size of this process in KiB, or None where it is not available (Windows).
+    '''
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes instead of KiB
+    return peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+
+@dataclass
+class StageMetrics:
+    calls : int = 0
+    # Wall time in seconds, nested calls of the same stage are only counted once
+    time : float = 0.0
+
+@dataclass
+class DocumentMetrics:
+    source_file : str = None
+    wall_time : float = 0.0
+    bytes_written : int = 0
+    # Peak resident set size of the process in KiB at the end of the document
+    peak_rss : int = None
+    # Peak of the memory allocated by Python during the document in KiB (only with trace_memory)
+    peak_traced : int = None
+    stages : Dict[str, StageMetrics] = field(default_factory=dict)
+
+class MetricsRecorder:
+    '''
+    Collects the metrics of the instrumented stages for one Word file at a time.
+    The stages are instrumented by install() only while a recorder is active,
+    so the conversion runs without any overhead otherwise.
+    '''
+
+    def __init__(self, trace_memory=False, profile=False) -> None:
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.document : DocumentMetrics = None
+        self.profiler : cProfile.Profile = None
+        self.active = {}
+        self.start = None
+
+    def begin_document(self, source_file):
+        self.document = DocumentMetrics(source_file=source_file)
+        self.active = {}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if self.profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = time.perf_counter()
+
+    def end_document(self) -> Tuple[DocumentMetrics, dict]:
+        '''
+        Returns the metrics of the current document and, if profiling is enabled,
+        the raw cProfile statistics, which can be sent from a worker process.
+        '''
+        document = self.document
+        document.wall_time = time.perf_counter() - self.start
+        profile_stats = None
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.create_stats()
+            profile_stats = self.profiler.stats
+            self.profiler = None
+        if self.trace_memory:
+            document.peak_traced = tracemalloc.get_traced_memory()[1] // 1024
+        document.peak_rss = get_peak_rss()
+        self.document = None
+        return document, profile_stats
+
+    def enter(self, stage):
+        depth = self.active.get(stage, 0)
+        self.active[stage] = depth + 1
+        return depth == 0
+
+    def leave(self, stage, elapsed, outermost):
+        self.active[stage] -= 1
+        if self.document is None:
+            return
+        stage_metrics = self.document.stages.get(stage)
+        if stage_metrics is None:
+            stage_metrics = self.document.stages[stage] = StageMetrics()
+        stage_metrics.calls += 1
+        if outermost:
+            stage_metrics.time += elapsed
+
+    def add_bytes_written(self, size):
+        if self.document is not None:
+            self.document.bytes_written += size
+
+_recorder : MetricsRecorder = None
+_installed = []
+
+def get_recorder() -> MetricsRecorder:
+    return _recorder
+
+def instrument(function, stage, on_result : Callable = None):
+    '''
+    Wraps a function so that its calls and wall time are recorded as stage.
+    on_result(recorder, result) can add further metrics from the return value.
+    '''
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        recorder = _recorder
+        if recorder is None:
+            return function(*args, **kwargs)
+        outermost = recorder.enter(stage)
+        start = time.perf_counter()
+        try:
+            result = function(*args, **kwargs)
+        finally:
+            recorder.leave(stage, time.perf_counter() - start, outermost)
+        if on_result is not None:
+            on_result(recorder, result)
+        return result
+    wrapper.__wrapped_stage__ = stage
+    return wrapper
+
+def install(hooks : List[tuple], recorder : MetricsRecorder) -> MetricsRecorder:
+    '''
+    Activates the recorder and instruments the methods given as
+    (class, method name, stage[, on_result]) tuples. Methods that are
+    already instrumented are left as they are.
+    '''
+    global _recorder
+    _recorder = recorder
+    for hook in hooks:
+        cls, name, stage = hook[:3]
+        on_result = hook[3] if len(hook) > 3 else None
+        function = cls.__dict__[name]
+        if hasattr(function, '__wrapped_stage__'):
+            continue
+        setattr(cls, name, instrument(function, stage, on_result))
+        _installed.append((cls, name, function))
+    return recorder
+
+def uninstall():
+    '''
+    Restores the original methods and deactivates the recorder.
+    '''
+    global _recorder
+    _recorder = None
+    while _installed:
+        cls, name, function = _installed.pop()
+        setattr(cls, name, function)
+
+def get_method_hooks(base_class, names : List[str], stage_prefix='') -> List[tuple]:
+    '''
+    Returns hooks for the given methods of base_class and all of its subclasses
+    that override them.
+    '''
+    hooks = []
+    classes = [base_class]
+    while classes:
+        cls = classes.pop(0)
+        for name in names:
+            if name in cls.__dict__:
+                hooks.append((cls, name, stage_prefix + name))
+        classes.extend(cls.__subclasses__())
+    return hooks
+
+class ProfileStats:
+    '''
+    Holds raw cProfile statistics in the form pstats.Stats can load.
+    '''
+    def __init__(self, stats) -> None:
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+def write_profile(path, profile_stats : List[dict]) -> bool:
+    '''
+    Merges the cProfile statistics of several documents into one pstats file.
+    '''
+    profile_stats = [s for s in profile_stats if s]
+    if not profile_stats:
+        return False
+    stats = pstats.Stats(ProfileStats(profile_stats[0]))
+    for s in profile_stats[1:]:
+        stats.add(ProfileStats(s))
+    stats.dump_stats(path)
+    return True
+
+def summarize(documents : List[DocumentMetrics]) -> dict:
+    stages = {}
+    for document in documents:
+        for stage, stage_metrics in document.stages.items():
+            total = stages.setdefault(stage, StageMetrics())
+            total.calls += stage_metrics.calls
+            total.time += stage_metrics.time
+    return {
+        'documents': len(documents),
+        'wall_time': sum(d.wall_time for d in documents),
+        'bytes_written': sum(d.bytes_written for d in documents),
+        'peak_rss': max((d.peak_rss for d in documents if d.peak_rss is not None), default=None),
+        'peak_traced': max((d.peak_traced for d in documents if d.peak_traced is not None), default=None),
+        'stages': {stage: asdict(s) for stage, s in sorted(stages.items(), key=lambda item: -item[1].time)},
+    }
+
+def write_report(path, documents : List[DocumentMetrics]):
+    '''
+    Writes the metrics of all documents and their totals as JSON.
+    '''
+    report = {
+        'unit': {'time': 'seconds', 'bytes_written': 'bytes', 'peak_rss': 'KiB', 'peak_traced': 'KiB'},
+        'total': summarize(documents),
+        'documents': [asdict(d) for d in documents],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,87 @@
+from typing import Any, Callable
+
+from word2md.markdown_document import MarkdownDocument, MarkdownSection, MarkdownParagraph
+from word2md.renderer import html_escape
+
+def to_text(value) -> str:
+    '''
+    Formats a value like a mustache variable: 0 and False are printed, other
+    falsy values (e.g. None) are empty.
+    '''
+    if value in (0, False):
+        return str(value)
+    if not value:
+        return ''
+    return value if isinstance(value, str) else str(value)
+
+def find_attribute(name, scopes):
+    '''
+    Looks up an attribute in the innermost scope (document object) that has it,
+    as the templates do for keys that are missing in the current scope.
+    '''
+    for scope in scopes:
+        attributes = vars(scope)
+        if name in attributes:
+            return attributes[name]
+    return None
+
+class NativeRenderer:
+    '''
+    Writes the Markdown file of a document directly from the MarkdownDocument
+    objects. The output is identical to the templates in word2md/mustache
+    (MDDocument, MDContent, MDSection and MDParagraph), which remain the
+    reference: any change to the templates must be made here as well.
+    '''
+
+    def render(self, header, markdown_document : MarkdownDocument, write : Callable[[str], Any]):
+        write('---\n')
+        write(to_text(header))
+        write('\n---\n\n')
+        for section in markdown_document.sections:
+            write('\n')
+            self.render_section(section, (markdown_document,), write)
+            write('\n')
+
+    def render_section(self, section : MarkdownSection, parents, write):
+        scopes = (section,) + parents
+        write(html_escape(to_text(section.section_level)))
+        write(' ')
+        write(html_escape(to_text(section.heading)))
+        write('\n\n')
+        write(''.join([self.paragraph_html(p, scopes) for p in section.paragraphs]))
+        write('\n')
+
+        for table in section.tables:
+            write('<table>\n')
+            for row in table.rows:
+                parts = ['<tr>\n']
+                for cell in row.cells:
+                    tag = 'th' if cell.is_heading else 'td'
+                    parts.append(f'<{tag} colspan={html_escape(to_text(cell.colspan))}>\n')
+                    cell_scopes = (cell, row, table) + scopes
+                    for p in cell.paragraphs:
+                        parts.append(self.paragraph_html(p, cell_scopes))
+                    parts.append(f'</{tag}>\n')
+                parts.append('</tr>\n')
+                write(''.join(parts))
+            write('</table>\n')
+
+        write('\n')
+        for sub_section in section.sub_sections:
+            self.render_section(sub_section, scopes, write)
+
+    def paragraph_html(self, paragraph : MarkdownParagraph, parents) -> str:
+        attributes = vars(paragraph)
+        is_heading = attributes['is_heading'] if 'is_heading' in attributes else find_attribute('is_heading', parents)
+        if is_heading:
+            return to_text(paragraph.text)
+
+        parts = []
+        markdown_text = paragraph.markdown_text
+        if markdown_text:
+            parts.append(to_text(markdown_text))
+        for graphic in paragraph.graphics:
+            parts.append(f'<p><img src="{html_escape(to_text(graphic.name))}"/></p>')
+        for equation in paragraph.equations:
+            parts.append(f'<p>{to_text(equation.mml)}</p>')
+        return ''.join(parts)
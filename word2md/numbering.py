@@ -0,0 +1,60 @@
+from typing import Dict
+from dataclasses import dataclass
+import math
+from docx.oxml.ns import qn
+
+@dataclass
+class NumberingLevel:
+    element : object = None
+    num_fmt : str = None
+    level : int = 0
+
+class NumberingIndex:
+    '''
+    Index over the numbering definitions of a Word document:
+    numId -> abstractNumId -> ilvl -> NumberingLevel.
+    Built once per document, so that list paragraphs can be classified
+    with dictionary lookups instead of searching the numbering part.
+    '''
+
+    def __init__(self, numbering_element) -> None:
+        self.abstract_num_ids : Dict[str, str] = {}
+        self.levels : Dict[str, Dict[str, NumberingLevel]] = {}
+
+        if numbering_element is None:
+            return
+
+        for num in numbering_element.iterchildren(qn('w:num')):
+            abstract_num_id = num.find(qn('w:abstractNumId'))
+            if abstract_num_id is not None:
+                self.abstract_num_ids.setdefault(num.get(qn('w:numId')), abstract_num_id.get(qn('w:val')))
+
+        for abstract_num in numbering_element.iterchildren(qn('w:abstractNum')):
+            levels = self.levels.setdefault(abstract_num.get(qn('w:abstractNumId')), {})
+            for lvl in abstract_num.iterchildren(qn('w:lvl')):
+                ilvl = lvl.get(qn('w:ilvl'))
+                if ilvl not in levels:
+                    levels[ilvl] = self.create_level(lvl)
+
+    def create_level(self, lvl) -> NumberingLevel:
+        num_fmt = lvl.find(qn('w:numFmt'))
+        return NumberingLevel(
+            element=lvl,
+            num_fmt=num_fmt.get(qn('w:val')) if num_fmt is not None else None,
+            level=self.get_indent_level(lvl)
+        )
+
+    def get_indent_level(self, lvl) -> int:
+        try:
+            lvl_indent = lvl.find('w:pPr/w:ind', namespaces=lvl.nsmap)
+            if lvl_indent is not None:
+                return math.floor(lvl_indent.left / 500000) + 1
+            return int(lvl.get(qn('w:ilvl'))) + 1
+        except:
+            return 0
+
+    def get_level(self, num_id, ilvl) -> NumberingLevel:
+        abstract_num_id = self.abstract_num_ids.get(num_id)
+        if abstract_num_id is None:
+            return None
+        return self.levels.get(abstract_num_id, {}).get(ilvl)
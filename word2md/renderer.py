@@ -0,0 +1,175 @@
+from typing import Any, Callable, Dict, List, NamedTuple
+from collections.abc import Iterator, Sequence
+import os
+import threading
+
+from chevron.tokenizer import tokenize
+
+TEMPLATES_PATH = os.path.join(os.path.dirname(__file__), 'mustache')
+TEMPLATE_EXT = 'mustache'
+
+# Node types of compiled templates
+LITERAL = 'literal'
+VARIABLE = 'variable'
+NO_ESCAPE = 'no escape'
+SECTION = 'section'
+INVERTED_SECTION = 'inverted section'
+PARTIAL = 'partial'
+
+class EmbeddedTemplate(NamedTuple):
+    '''
+    Value of an unescaped variable ({{{name}}}) that is rendered from another
+    template in place, instead of being rendered to a string first.
+    '''
+    template_name : str
+    data : Dict[str, Any]
+
+def html_escape(text) -> str:
+    return text.replace('&', '&amp;').replace('"', '&quot;').replace('<', '&lt;').replace('>', '&gt;')
+
+def get_key(key, scopes):
+    '''
+    Looks up a (dotted) key in the scopes like chevron does.
+    '''
+    if key == '.':
+        return scopes[0]
+
+    simple_key = '.' not in key
+    for scope in scopes:
+        if simple_key and type(scope) is dict:
+            # Fast path for the dicts of MarkdownBase.to_dict
+            if key not in scope:
+                continue
+            scope = scope[key]
+            if scope in (0, False):
+                return scope
+            return scope or ''
+        if simple_key and scope is True and not hasattr(scope, key):
+            # Scope of inverted sections, which has no keys
+            continue
+        try:
+            for child in key.split('.'):
+                try:
+                    scope = scope[child]
+                except (TypeError, AttributeError):
+                    try:
+                        scope = getattr(scope, child)
+                    except (TypeError, AttributeError):
+                        scope = scope[int(child)]
+
+            if scope in (0, False):
+                return scope
+            return scope or ''
+        except (AttributeError, KeyError, IndexError, ValueError):
+            pass
+    return ''
+
+class TemplateRenderer:
+    '''
+    Renders the mustache templates with the same output as chevron.render.
+    Templates are read and compiled to a tree of nodes once, partials are
+    looked up among the compiled templates and the output is passed to a
+    write function (e.g. the write method of a file) piece by piece.
+
+    Lambdas and indented standalone partials, which the templates do not use,
+    are not supported.
+    '''
+
+    def __init__(self, templates_path=TEMPLATES_PATH) -> None:
+        self.templates_path = templates_path
+        self.templates : Dict[str, List[tuple]] = {}
+        self.lock = threading.Lock()
+
+    def get_template(self, template_name) -> List[tuple]:
+        template = self.templates.get(template_name)
+        if template is None:
+            with self.lock:
+                template = self.templates.get(template_name)
+                if template is None:
+                    template = self.compile(self.read_template(template_name))
+                    self.templates[template_name] = template
+        return template
+
+    def read_template(self, template_name) -> str:
+        try:
+            with open(os.path.join(self.templates_path, template_name), 'r', encoding='utf-8') as template:
+                return template.read()
+        except OSError:
+            # chevron renders missing partials as empty strings
+            if template_name.endswith('.' + TEMPLATE_EXT):
+                return ''
+            raise
+
+    @staticmethod
+    def compile(template) -> List[tuple]:
+        root = []
+        stack = [root]
+        for tag, key in tokenize(template):
+            nodes = stack[-1]
+            if tag == LITERAL:
+                nodes.append((LITERAL, key))
+            elif tag in (VARIABLE, NO_ESCAPE):
+                nodes.append((tag, key))
+            elif tag in (SECTION, INVERTED_SECTION):
+                children = []
+                nodes.append((tag, key, children))
+                stack.append(children)
+            elif tag == 'end':
+                stack.pop()
+            elif tag == PARTIAL:
+                if nodes and nodes[-1][0] == LITERAL and nodes[-1][1].rpartition('\n')[2].isspace():
+                    raise ValueError(f'Indented partial "{key}" is not supported')
+                nodes.append((PARTIAL, key + '.' + TEMPLATE_EXT))
+        return root
+
+    def render(self, template_name, data, write : Callable[[str], Any]):
+        self.render_nodes(self.get_template(template_name), [data], write)
+
+    def render_to_string(self, template_name, data) -> str:
+        parts = []
+        self.render(template_name, data, parts.append)
+        return ''.join(parts)
+
+    def render_nodes(self, nodes, scopes, write):
+        for node in nodes:
+            tag = node[0]
+            if tag == LITERAL:
+                write(node[1])
+            elif tag == VARIABLE:
+                value = get_key(node[1], scopes)
+                if value is True and node[1] == '.':
+                    value = scopes[1]
+                write(html_escape(value if isinstance(value, str) else str(value)))
+            elif tag == NO_ESCAPE:
+                value = get_key(node[1], scopes)
+                if isinstance(value, EmbeddedTemplate):
+                    self.render(value.template_name, value.data, write)
+                else:
+                    write(value if isinstance(value, str) else str(value))
+            elif tag == SECTION:
+                scope = get_key(node[1], scopes)
+                if type(scope) is list or (isinstance(scope, (Sequence, Iterator)) and not isinstance(scope, str)):
+                    for item in scope:
+                        # chevron skips the content of falsy items
+                        if item:
+                            self.render_nodes(node[2], [item] + scopes, write)
+                elif callable(scope):
+                    raise ValueError(f'Lambda "{node[1]}" is not supported')
+                elif scope:
+                    self.render_nodes(node[2], [scope] + scopes, write)
+            elif tag == INVERTED_SECTION:
+                if not get_key(node[1], scopes):
+                    self.render_nodes(node[2], [True] + scopes, write)
+            elif tag == PARTIAL:
+                self.render_nodes(self.get_template(node[1]), scopes, write)
+
+_renderer = None
+
+def get_renderer() -> TemplateRenderer:
+    '''
+    Returns the renderer of the process, which compiles each template only once.
+    '''
+    global _renderer
+    if _renderer is None:
+        _renderer = TemplateRenderer()
+    return _renderer
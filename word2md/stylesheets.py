@@ -0,0 +1,52 @@
+import os
+import hashlib
+import threading
+from lxml import etree
+
+XSL_PATH = os.path.join(os.path.dirname(__file__), 'xsl')
+
+OMML2MML = 'omml2mml_v2.xsl'
+REMOVE_NAMESPACES = 'remove_namespaces.xsl'
+OMML2MML_WITHOUT_NAMESPACES = 'omml2mml_nons.xsl'
+
+_stylesheets = {}
+_versions = {}
+_lock = threading.Lock()
+
+def get_stylesheet(name) -> etree.XSLT:
+    '''
+    Returns the compiled XSLT stylesheet with the given file name from the xsl folder.
+    Stylesheets are compiled on first use and shared by all converters of the process.
+    '''
+    stylesheet = _stylesheets.get(name)
+    if stylesheet is None:
+        with _lock:
+            stylesheet = _stylesheets.get(name)
+            if stylesheet is None:
+                stylesheet = etree.XSLT(etree.parse(os.path.join(XSL_PATH, name)))
+                _stylesheets[name] = stylesheet
+    return stylesheet
+
+def omml_to_mathml(omml_element) -> str:
+    '''
+    Converts an OMML element (m:oMath) to a MathML string without namespaces.
+    '''
+    mml = get_stylesheet(OMML2MML_WITHOUT_NAMESPACES)(omml_element)
+    return etree.tostring(mml, encoding='unicode')
+
+def get_stylesheet_version(*names) -> str:
+    '''
+    Returns a hash over the contents of the given stylesheets, which changes
+    whenever one of the stylesheets is modified.
+    '''
+    version = _versions.get(names)
+    if version is None:
+        sha = hashlib.sha256()
+        for name in names:
+            with open(os.path.join(XSL_PATH, name), 'rb') as f:
+                sha.update(f.read())
+        version = _versions[names] = sha.hexdigest()
+    return version
+
+def get_omml_to_mathml_version() -> str:
+    return get_stylesheet_version(OMML2MML_WITHOUT_NAMESPACES, OMML2MML)
@@ -1,9 +1,10 @@
 from typing import List, Union
-import re
+
+from docx.oxml.ns import qn
 
 from word2md.converter_base import Word2MDConverter
 from word2md.markdown_document import MarkdownDocument, MarkdownSection, MarkdownTable
-from word2md.helpers import strings_equal
+from word2md.helpers import StringMatcher
 
 class TableBasedConverter(Word2MDConverter):
     def __init__(self, document, force_png_graphics=False):
@@ -38,12 +39,14 @@ class TableBasedConverter(Word2MDConverter):
         return self.has_background_color(cell)
     
     def has_background_color(self, cell):
-        pattern = re.compile('w:fill=\"(\S*)\"')
-        match = pattern.search(cell._tc.xml)
-        if match:
-            result = match.group(1)
-            if result and result != 'auto':
-                return True
+        # The first w:fill attribute in the cell decides, e.g. of w:tcPr/w:shd
+        fill_attribute = qn('w:fill')
+        for element in cell._tc.iter():
+            result = element.get(fill_attribute)
+            if result is not None:
+                if result and result != 'auto':
+                    return True
+                return False
         return False
     
     def new_table_section(self, table : MarkdownTable, parent : Union[MarkdownDocument, MarkdownSection], heading : str = None, remove_first_row : bool = False) -> MarkdownSection:
@@ -54,6 +57,7 @@ class TableBasedConverter(Word2MDConverter):
         
         if remove_first_row:
             table.rows.pop(0)
+            table.invalidate_index()
         section.tables.append(table)
 
         if isinstance(parent, MarkdownDocument):
@@ -66,6 +70,7 @@ class TableBasedConverter(Word2MDConverter):
 
 class SystemConfigurationConverter(TableBasedConverter):
     CONVERTER_TYPE = 'System Configuration'
+    TABLE_HEADINGS = StringMatcher(['Component description', 'System Configuration Identification'])
 
     def __init__(self, document, no_emf=False):
         super().__init__(document, no_emf)
@@ -75,15 +80,15 @@ class SystemConfigurationConverter(TableBasedConverter):
         component_desc_sec = None
         sc_id = None
         sc_desc = None
-        for table in tables:
-            heading = self.get_table_heading(table)
-            if strings_equal(heading, 'Component description'):
+        headings_equal = self.TABLE_HEADINGS.is_equal_all([self.get_table_heading(table) for table in tables])
+        for table, (is_component_description, is_identification) in zip(tables, headings_equal):
+            if is_component_description:
                 if component_desc_sec is None:
                     component_desc_sec = MarkdownSection(heading='Component descriptions')
                     md_doc.sections.append(component_desc_sec)
                 self.new_table_section(table, component_desc_sec, heading=table.get_cell_content('Class ID', 1, 0))
                 continue
-            if strings_equal(heading, 'System Configuration Identification'):
+            if is_identification:
                 sc_id = table.get_cell_content('System configuration ID', 0, 1)
                 sc_desc = table.get_cell_content('Name', 0, 1)
             self.new_table_section(table, md_doc)
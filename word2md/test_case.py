@@ -1,3 +1,6 @@
+from typing import List
+from dataclasses import dataclass
+from enum import Enum
 import re
 from word2md.converter_base import Word2MDConverter
 from word2md.markdown_document import (
@@ -6,13 +9,34 @@ from word2md.markdown_document import (
     MarkdownTable
 )
 
+class ParagraphKind(Enum):
+    TEXT = 'text'
+    TEST_CASE_HEADLINE = 'test case headline'
+    TEST_SPECIFICATION_HEADLINE = 'test specification headline'
+    EXPERIMENT_SPECIFICATION_HEADLINE = 'experiment specification headline'
+    QUALIFICATION_STRATEGY_HEADLINE = 'qualification strategy headline'
+    MAPPING_HEADLINE = 'mapping headline'
+    AUTHOR_VERSION = 'author and version'
+    PROJECT_DATE = 'project and date'
+
+@dataclass
+class ParagraphEvent:
+    kind : ParagraphKind = ParagraphKind.TEXT
+    paragraph : object = None
+    match : re.Match = None
+
 class TestCaseConverter(Word2MDConverter):
+    TEST_CASE_HEADLINE_REGEX = re.compile('\s*Test\s+Case\s+(.*)')
+    TEST_SPECIFICATION_HEADLINE_REGEX = re.compile('\s*Test\s+Specification\s+(.*)')
+    EXPERIMENT_SPECIFICATION_HEADLINE_REGEX = re.compile('\s*Experiment\s+Specification\s+(.*)')
+    AUTHOR_VERSION_REGEX = re.compile('Author:?\s+(.*)\s+Version:?\s+(.*)')
+    PROJECT_DATE_REGEX = re.compile('Project:?\s+(.*)\s+Date:?\s+(.*)')
 
     def __init__(self, document, no_emf=False):
         super().__init__(document, no_emf)        
-        self.test_case_headline_regex = re.compile('\s*Test\s+Case\s+(.*)')
-        self.test_specification_headline_regex = re.compile('\s*Test\s+Specification\s+(.*)')
-        self.experiment_specification_headline_regex = re.compile('\s*Experiment\s+Specification\s+(.*)')
+        self.test_case_headline_regex = self.TEST_CASE_HEADLINE_REGEX
+        self.test_specification_headline_regex = self.TEST_SPECIFICATION_HEADLINE_REGEX
+        self.experiment_specification_headline_regex = self.EXPERIMENT_SPECIFICATION_HEADLINE_REGEX
 
         self.test_case = {'content': None, 'title': None, 'short_title': None, 'description': None, 'id': None}
         self.test_specs = []
@@ -21,6 +45,40 @@ class TestCaseConverter(Word2MDConverter):
         self.tc_md_doc = None
         self.ts_md_docs = {}
 
+        self._paragraph_index = None
+
+    @property
+    def paragraph_index(self) -> List[ParagraphEvent]:
+        '''
+        One ParagraphEvent for every paragraph of the document, classified in a single pass.
+        '''
+        if self._paragraph_index is None:
+            self._paragraph_index = [self.classify_paragraph(p) for p in self.document.paragraphs]
+        return self._paragraph_index
+
+    def classify_paragraph(self, paragraph) -> ParagraphEvent:
+        text = paragraph.text
+        for kind, regex in [(ParagraphKind.TEST_CASE_HEADLINE, self.test_case_headline_regex),
+                            (ParagraphKind.TEST_SPECIFICATION_HEADLINE, self.test_specification_headline_regex),
+                            (ParagraphKind.EXPERIMENT_SPECIFICATION_HEADLINE, self.experiment_specification_headline_regex)]:
+            match = regex.match(text)
+            if match and self.is_bold(paragraph):
+                return ParagraphEvent(kind=kind, paragraph=paragraph, match=match)
+
+        stripped_text = text.strip()
+        if stripped_text == 'Qualification Strategy' and self.is_bold(paragraph):
+            return ParagraphEvent(kind=ParagraphKind.QUALIFICATION_STRATEGY_HEADLINE, paragraph=paragraph)
+        if stripped_text == 'Mapping to Research Infrastructure' and self.is_bold(paragraph):
+            return ParagraphEvent(kind=ParagraphKind.MAPPING_HEADLINE, paragraph=paragraph)
+
+        for kind, regex in [(ParagraphKind.AUTHOR_VERSION, self.AUTHOR_VERSION_REGEX),
+                            (ParagraphKind.PROJECT_DATE, self.PROJECT_DATE_REGEX)]:
+            match = regex.match(text)
+            if match:
+                return ParagraphEvent(kind=kind, paragraph=paragraph, match=match)
+
+        return ParagraphEvent(kind=ParagraphKind.TEXT, paragraph=paragraph)
+
     def internal_convert(self):
         test_specifications = self.find_test_specifications()
         experiment_specifications = self.find_experiment_specifications()
@@ -122,27 +180,24 @@ class TestCaseConverter(Word2MDConverter):
 
         qs_section_paragraphs = []
 
-        re_author_version = re.compile('Author:?\s+(.*)\s+Version:?\s+(.*)')
-        re_project_date = re.compile('Project:?\s+(.*)\s+Date:?\s+(.*)')
         is_qs = False
-        for p in self.document.paragraphs:
-            text = p.text
-            if self.is_test_case_headline(p):
-                tc_id = self.test_case_headline_regex.match(text).group(1).strip()
+        for event in self.paragraph_index:
+            if event.kind == ParagraphKind.TEST_CASE_HEADLINE:
+                tc_id = event.match.group(1).strip()
                 self.add_simple_row_heading(id_table, 'ID', tc_id)
-            if re_author_version.match(text):
-                self.add_simple_row_heading(id_table, 'Author', re_author_version.match(text).group(1).strip())
-                self.add_simple_row_heading(id_table, 'Version', re_author_version.match(text).group(2).strip())
-            if re_project_date.match(text):
-                self.add_simple_row_heading(id_table, 'Project', re_project_date.match(text).group(1).strip())
-                self.add_simple_row_heading(id_table, 'Date', re_project_date.match(text).group(2).strip())
-            if self.is_test_specification_headline(p):
+            elif event.kind == ParagraphKind.AUTHOR_VERSION:
+                self.add_simple_row_heading(id_table, 'Author', event.match.group(1).strip())
+                self.add_simple_row_heading(id_table, 'Version', event.match.group(2).strip())
+            elif event.kind == ParagraphKind.PROJECT_DATE:
+                self.add_simple_row_heading(id_table, 'Project', event.match.group(1).strip())
+                self.add_simple_row_heading(id_table, 'Date', event.match.group(2).strip())
+            if event.kind == ParagraphKind.TEST_SPECIFICATION_HEADLINE:
                 break
-            if self.is_qualification_strategy_headline(p):
+            if event.kind == ParagraphKind.QUALIFICATION_STRATEGY_HEADLINE:
                 is_qs = True
                 qs_section_paragraphs = []
             elif is_qs:     
-                qs_section_paragraphs.append(p)      
+                qs_section_paragraphs.append(event.paragraph)      
 
         tc_table = self.parse_tc_table(table)
 
@@ -168,16 +223,18 @@ class TestCaseConverter(Word2MDConverter):
         test_specs = []
         
         is_mapping = False
-        for p in self.document.paragraphs:
-            text = p.text
-            if self.is_test_specification_headline(p):
+        for event in self.paragraph_index:
+            p = event.paragraph
+            if event.kind == ParagraphKind.TEST_SPECIFICATION_HEADLINE:
                 test_spec = {}
-                test_spec['ID'] = {'desc': self.test_specification_headline_regex.match(text).group(1).strip()}
+                test_spec['ID'] = {'desc': event.match.group(1).strip()}
                 test_specs.append(test_spec)
+                # The mapping of the previous test specification ends here
+                is_mapping = False
             
-            if self.is_experiment_specification_headline(p):
+            if event.kind == ParagraphKind.EXPERIMENT_SPECIFICATION_HEADLINE:
                 break
-            if self.is_mapping_headline(p):
+            if event.kind == ParagraphKind.MAPPING_HEADLINE:
                 is_mapping = True
                 test_spec = test_specs[-1]
                 test_spec['Mapping to Research Infrastructure'] = {'desc': '', 'graphics': []}
@@ -192,11 +249,10 @@ class TestCaseConverter(Word2MDConverter):
     def find_experiment_specifications(self):
         experiment_specs = []
         
-        for p in self.document.paragraphs:
-            text = p.text
-            if self.is_experiment_specification_headline(p):
+        for event in self.paragraph_index:
+            if event.kind == ParagraphKind.EXPERIMENT_SPECIFICATION_HEADLINE:
                 exp_spec = {}
-                exp_spec['ID'] = {'desc': self.experiment_specification_headline_regex.match(text).group(1).strip()}
+                exp_spec['ID'] = {'desc': event.match.group(1).strip()}
                 experiment_specs.append(exp_spec)
         return experiment_specs
 
@@ -259,6 +315,7 @@ class TestCaseConverter(Word2MDConverter):
             first_cell.paragraphs[0].text = id
             first_cell.paragraphs = first_cell.paragraphs[:1]
             first_cell.is_heading = True
+        tc_table.invalidate_index()
 
         return tc_table
     
\ No newline at end of file
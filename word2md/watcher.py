@@ -0,0 +1,202 @@
+from typing import Dict, Optional, Set, Tuple
+import os
+import time
+import errno
+import select
+import struct
+import logging
+import ctypes
+import ctypes.util
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+def is_word_file(path) -> bool:
+    '''
+    Word files that can be converted, without the lock files (~$name.docx)
+    Word creates next to open documents.
+    '''
+    name = os.path.basename(path)
+    return name.endswith('.docx') and not name.startswith('~$')
+
+class PollingWatcher:
+    '''
+    Detects changed, added and removed Word files by comparing the modification
+    time and size of all Word files in a folder every interval seconds.
+    '''
+
+    def __init__(self, folder, recurse=False, interval=1.0) -> None:
+        self.folder = folder
+        self.recurse = recurse
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        folders = [self.folder]
+        while folders:
+            try:
+                entries = list(os.scandir(folders.pop()))
+            except OSError:
+                continue
+            for f in entries:
+                try:
+                    if f.is_file() and is_word_file(f.path):
+                        stat = f.stat()
+                        snapshot[f.path] = (stat.st_mtime_ns, stat.st_size)
+                    elif self.recurse and f.is_dir():
+                        folders.append(f.path)
+                except OSError:
+                    continue
+        return snapshot
+
+    def wait(self, timeout=None) -> Optional[Set[str]]:
+        '''
+        Waits up to timeout seconds (forever if None) for changes and returns the
+        paths of the changed Word files, an empty set if there were none.
+        '''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            snapshot = self.scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys() if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed:
+                return changed
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return changed
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    '''
+    Detects changed, added and removed Word files with inotify (Linux only).
+    Raises OSError if inotify is not available.
+    '''
+
+    def __init__(self, folder, recurse=False) -> None:
+        self.folder = folder
+        self.recurse = recurse
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if not hasattr(self.libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, 'inotify is not available')
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.watches : Dict[int, str] = {}
+        try:
+            self.add_watches(folder)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, folder):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error), folder)
+        self.watches[wd] = folder
+
+    def add_watches(self, folder) -> Set[str]:
+        '''
+        Watches a folder and, with recurse, all of its subfolders.
+        Returns the Word files that are already in there.
+        '''
+        self.add_watch(folder)
+        found = set()
+        for f in os.scandir(folder):
+            if f.is_file() and is_word_file(f.path):
+                found.add(f.path)
+            elif self.recurse and f.is_dir():
+                found.update(self.add_watches(f.path))
+        return found
+
+    def read_events(self):
+        data = b''
+        while True:
+            try:
+                chunk = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            yield wd, mask, name
+
+    def wait(self, timeout=None) -> Optional[Set[str]]:
+        '''
+        Waits up to timeout seconds (forever if None) for changes and returns the
+        paths of the changed Word files, an empty set if there were none, or None
+        if events were lost and the whole folder has to be checked again.
+        '''
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        changed = set()
+        for wd, mask, name in self.read_events():
+            if mask & IN_Q_OVERFLOW:
+                return None
+            folder = self.watches.get(wd)
+            if folder is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if folder == self.folder:
+                    return None
+                continue
+            path = os.path.join(folder, name)
+            if mask & IN_ISDIR:
+                if self.recurse and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may have been added before the folder is watched
+                    try:
+                        changed.update(self.add_watches(path))
+                    except OSError:
+                        pass
+                elif mask & IN_MOVED_FROM:
+                    # The outputs of the Word files in a moved folder have to be removed
+                    return None
+            elif is_word_file(path):
+                changed.add(path)
+        return changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+def create_watcher(folder, recurse=False, poll_interval=1.0):
+    '''
+    Returns an InotifyWatcher or, if inotify cannot be used, a PollingWatcher.
+    '''
+    try:
+        return InotifyWatcher(folder, recurse=recurse)
+    except (OSError, AttributeError) as e:
+        logging.info(f'inotify is not available ({e}), polling for changes every {poll_interval} s')
+        return PollingWatcher(folder, recurse=recurse, interval=poll_interval)
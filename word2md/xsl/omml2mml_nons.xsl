@@ -0,0 +1,38 @@
+<?xml version="1.0"?>
+<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform"
+    xmlns:exsl="http://exslt.org/common" exclude-result-prefixes="exsl">
+
+    <!-- Converts OMML to MathML without namespaces in a single transform. -->
+    <!-- Combines omml2mml_v2.xsl with the templates of remove_namespaces.xsl -->
+
+    <xsl:import href="omml2mml_v2.xsl"/>
+
+    <xsl:output indent="yes" method="xml" encoding="utf-8" omit-xml-declaration="yes"/>
+
+    <xsl:template match="/">
+        <xsl:variable name="mml">
+            <xsl:apply-imports/>
+        </xsl:variable>
+        <xsl:apply-templates select="exsl:node-set($mml)/node()" mode="remove-namespaces"/>
+    </xsl:template>
+
+    <!-- template to copy elements -->
+    <xsl:template match="*" mode="remove-namespaces">
+        <xsl:element name="{local-name()}">
+            <xsl:apply-templates select="@* | node()" mode="remove-namespaces"/>
+        </xsl:element>
+    </xsl:template>
+
+    <!-- template to copy attributes -->
+    <xsl:template match="@*" mode="remove-namespaces">
+        <xsl:attribute name="{local-name()}">
+            <xsl:value-of select="."/>
+        </xsl:attribute>
+    </xsl:template>
+
+    <!-- template to copy the rest of the nodes -->
+    <xsl:template match="comment() | text() | processing-instruction()" mode="remove-namespaces">
+        <xsl:copy/>
+    </xsl:template>
+
+</xsl:stylesheet>